@@ -1,32 +1,17 @@
 import time
-import traceback
+import asyncio
+import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional, TypedDict, Dict
-from enum import Enum
 from uuid import uuid4
 from app.utils.logger import logger
 from app.utils.agent_logger import log_agent_event
+from app.agents.enums import PriorityLevel, CategoryType, QueueType
 
-# ---------------- Enums for Type Safety ----------------
-
-class PriorityLevel(str, Enum):
-    HIGH = "High"
-    MEDIUM = "Medium"
-    LOW = "Low"
-
-class CategoryType(str, Enum):
-    BILLING = "Billing Support"
-    DISPATCH = "Dispatch Communication"
-    SENSOR = "Sensor Alert"
-    MARKETING = "Marketing"
-    GENERAL = "General Inquiry"
-
-class QueueType(str, Enum):
-    FINANCE = "Finance Support"
-    DISPATCH = "Dispatch Team"
-    OPS = "Ops Team"
-    AUTOMATION = "Automation"
-    SUPPORT = "Customer Support"
+# Agent-event logging runs off the response path; two workers are plenty
+# for serializing log payloads and the bounded pool caps memory use.
+_LOG_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="agent-log")
 
 # ---------------- TypedDicts for I/O ----------------
 
@@ -52,38 +37,63 @@ class AgentOutput(TypedDict):
 
 class Timer:
     def __enter__(self):
-        self.start = time.time()
+        self.start = time.perf_counter_ns()
+        self.end: Optional[int] = None
         return self
 
     def __exit__(self, *args):
-        self.end = time.time()
-        self.latency_ms = round((self.end - self.start) * 1000, 2)
+        self.end = time.perf_counter_ns()
+
+    @property
+    def latency_ms(self) -> float:
+        # Computed at read time, so it is valid both inside the with
+        # block (elapsed so far) and after __exit__ (final figure).
+        end = self.end if self.end is not None else time.perf_counter_ns()
+        return (end - self.start) / 1e6
 
 # ---------------- Base Agent ----------------
 
 class BaseAgent(ABC):
     name: str = "BaseAgent"
     version: str = "1.0"
+    # Bare strings rather than enum members: the fallback path runs on
+    # every error/timeout and plain strings skip the Enum descriptor
+    # machinery entirely. The enums remain the source of truth for
+    # validation elsewhere.
     fallback_config: Dict[str, Any] = {
-        "category": CategoryType.GENERAL,
-        "priority": PriorityLevel.MEDIUM,
+        "category": CategoryType.GENERAL.value,
+        "priority": PriorityLevel.MEDIUM.value,
         "intent": "Unknown",
-        "recommended_queue": QueueType.SUPPORT,
+        "recommended_queue": QueueType.SUPPORT.value,
         "confidence": 0.0
     }
 
     def __init__(self, metadata: Optional[Dict[str, Any]] = None):
         self.metadata = metadata or {}
 
-    def execute(self, input_data: AgentInput) -> AgentOutput:
+    def set_metadata(self, metadata: Dict[str, Any]) -> None:
+        """Attaches per-request context (request_id, ip) used by routes."""
+        self.metadata = metadata
+
+    async def execute(self, input_data: AgentInput) -> AgentOutput:
         self._validate_input(input_data)
         request_id = str(uuid4())
 
         with Timer() as timer:
             try:
-                self.preprocess(input_data)
+                if asyncio.iscoroutinefunction(self.preprocess):
+                    await self.preprocess(input_data)
+                else:
+                    self.preprocess(input_data)
+
                 result = self.run(input_data)
-                self.postprocess(result)
+                if asyncio.iscoroutine(result):
+                    result = await result
+
+                if asyncio.iscoroutinefunction(self.postprocess):
+                    await self.postprocess(result)
+                else:
+                    self.postprocess(result)
 
                 result["confidence"] = min(max(result.get("confidence", 0.0), 0.0), 1.0)
                 result.update({
@@ -94,7 +104,8 @@ class BaseAgent(ABC):
                     "error": result.get("error")
                 })
 
-                log_agent_event(
+                _LOG_POOL.submit(
+                    log_agent_event,
                     agent_name=self.name,
                     input_data=input_data,
                     output_data=result,
@@ -105,10 +116,18 @@ class BaseAgent(ABC):
                 return result  # type: ignore
 
             except Exception as e:
-                logger.exception(f"[{self.name}] Unhandled error during execution")
+                # Traceback formatting is costly and errors are routine
+                # here (rate limits, validation); only pay for it when
+                # DEBUG-level detail is actually wanted.
+                logger.error(
+                    "[%s] Unhandled error during execution: %s",
+                    self.name, e,
+                    exc_info=logger.isEnabledFor(logging.DEBUG)
+                )
                 fallback = self.fallback(str(e), timer.latency_ms)
 
-                log_agent_event(
+                _LOG_POOL.submit(
+                    log_agent_event,
                     agent_name=self.name,
                     input_data=input_data,
                     output_data=fallback,
@@ -119,12 +138,38 @@ class BaseAgent(ABC):
 
                 return fallback
 
+    async def execute_many(self, inputs: list, return_exceptions: bool = False) -> list:
+        """
+        Executes a batch of inputs concurrently. All underlying LLM calls
+        overlap, so wall-clock is bounded by the slowest call instead of
+        the sum of all of them. Per-input failures fall back individually
+        inside execute and never abort the batch; set return_exceptions
+        to also capture errors raised before execute's handling kicks in
+        (e.g. input validation) as list entries instead of raising.
+        """
+        return await asyncio.gather(
+            *(self.execute(i) for i in inputs),
+            return_exceptions=return_exceptions
+        )
+
+    async def aclose(self) -> None:
+        """
+        Releases the agent's LLM client when the agent owns one. Agents
+        built on the module-level shared transport never close it — the
+        shared client (and its HTTP pool) is closed once at application
+        shutdown — so this only acts on agents constructed with their
+        own injected client.
+        """
+        client = getattr(self, "client", None)
+        if client is not None and getattr(self, "_owns_client", False):
+            await client.close()
+
     @abstractmethod
     def run(self, input_data: AgentInput) -> AgentOutput:
         pass
 
     def fallback(self, reason: str, latency: float = 0.0) -> AgentOutput:
-        logger.warning(f"[{self.name}] Using fallback due to: {reason}")
+        logger.warning("[%s] Using fallback due to: %s", self.name, reason)
 
         return {
             "category": self.fallback_config["category"],
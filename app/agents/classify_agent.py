@@ -1,15 +1,119 @@
 import os
-import json
+import re
 import asyncio
+from hashlib import blake2b
 from typing import Dict, Any, Optional
+import orjson
 from cachetools import TTLCache
 from openai import AsyncOpenAI, OpenAIError, AuthenticationError, RateLimitError
-from dotenv import load_dotenv
+from app.config import OPENAI_API_KEY, get_async_openai_client
 from app.agents.base_agent import BaseAgent, AgentInput, AgentOutput
 from app.utils.logger import logger
+from app.utils.semantic_cache import SemanticCache
+from app.models.classification_result import ClassifyResult
+from app.utils.tokens import truncate_to_tokens
 from app.agents.enums import PriorityLevel, CategoryType, QueueType
 
-load_dotenv()
+# Precomputed enum value sets so reply validation is an O(1) hash lookup
+# instead of rebuilding a list of enum values on every parse.
+_CATEGORY_VALUES = frozenset(e.value for e in CategoryType)
+_PRIORITY_VALUES = frozenset(e.value for e in PriorityLevel)
+_QUEUE_VALUES = frozenset(e.value for e in QueueType)
+
+# Rule-classifier result constants. Treated as immutable — callers copy
+# before augmenting. Allocating them once avoids rebuilding the dict
+# literals on every message.
+_SENSOR_RESULT = {
+    "category": CategoryType.SENSOR.value,
+    "intent": "Sensor Alert",
+    "priority": PriorityLevel.HIGH.value,
+    "recommended_queue": QueueType.OPS.value,
+    "confidence": 0.95
+}
+_DISPATCH_RESULT = {
+    "category": CategoryType.DISPATCH.value,
+    "intent": "Schedule Inquiry",
+    "priority": PriorityLevel.MEDIUM.value,
+    "recommended_queue": QueueType.DISPATCH.value,
+    "confidence": 0.92
+}
+_BILLING_RESULT = {
+    "category": CategoryType.BILLING.value,
+    "intent": "Billing Issue",
+    "priority": PriorityLevel.HIGH.value,
+    "recommended_queue": QueueType.FINANCE.value,
+    "confidence": 0.93
+}
+_MARKETING_RESULT = {
+    "category": CategoryType.MARKETING.value,
+    "intent": "Unsubscribe Request",
+    "priority": PriorityLevel.LOW.value,
+    "recommended_queue": QueueType.AUTOMATION.value,
+    "confidence": 0.99
+}
+
+# Per-call user message template. A module-level constant with
+# format_map avoids re-parsing an f-string template on every cache miss,
+# and with the few-shot examples in the static prefix it needs no
+# escaped braces.
+_PROMPT_TEMPLATE = "Product: {product}\nChannel: {channel}\nMessage: {content}"
+
+# Single-pass C-level character cleanup for _sanitize; one translate()
+# call replaces chained str.replace passes (each of which copies the
+# whole string).
+_SANITIZE_TABLE = str.maketrans({"\n": " ", "\r": None, "\t": " "})
+
+# One compiled scan over the content replaces a dozen substring searches;
+# the dict maps whichever keyword matched first to its result.
+#
+# Note on JIT compilation: don't bother pointing numba (or similar) at
+# this rule tier. The workload is pure string handling, which JIT
+# compilers handle poorly, and the compiled `re` alternation already
+# runs the scan in C — faster than an njit'd substring loop would be.
+_KW_RE = re.compile(
+    r"\b(full|pack-out|sensor error|dispatch|pickup|eta|driver"
+    r"|invoice|charge|billing|surcharge|unsubscribe)\b"
+)
+_KW_TO_RESULT = {
+    "full": _SENSOR_RESULT,
+    "pack-out": _SENSOR_RESULT,
+    "sensor error": _SENSOR_RESULT,
+    "dispatch": _DISPATCH_RESULT,
+    "pickup": _DISPATCH_RESULT,
+    "eta": _DISPATCH_RESULT,
+    "driver": _DISPATCH_RESULT,
+    "invoice": _BILLING_RESULT,
+    "charge": _BILLING_RESULT,
+    "billing": _BILLING_RESULT,
+    "surcharge": _BILLING_RESULT,
+    "unsubscribe": _MARKETING_RESULT
+}
+
+
+def classify_message(msg: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Deterministic keyword classifier for the obvious traffic patterns.
+    Used to short-circuit the LLM round trip: most production messages
+    match one of these buckets, collapsing hundreds of ms of network
+    latency to microseconds of Python. Returns a low-confidence General
+    Inquiry result when nothing matches so callers can fall through.
+    """
+    content = (msg.get("content") or "").lower()
+    product = (msg.get("product") or "").strip()
+
+    match = _KW_RE.search(content)
+    if match:
+        return _KW_TO_RESULT[match.group(1)]
+
+    # Product alone is a weak signal; report it below the confidence
+    # threshold so the LLM still gets the final say.
+    return {
+        "category": CategoryType.GENERAL.value,
+        "intent": "Unknown",
+        "priority": PriorityLevel.MEDIUM.value,
+        "recommended_queue": QueueType.SUPPORT.value,
+        "confidence": 0.4 if product else 0.2
+    }
 
 class ClassificationAgent(BaseAgent):
     """
@@ -23,31 +127,95 @@ class ClassificationAgent(BaseAgent):
     name: str = "ClassificationAgent"
     version: str = "2.0.0"
     fallback_config: Dict[str, Any] = {
-        "category": CategoryType.GENERAL,
-        "priority": PriorityLevel.MEDIUM,
+        "category": CategoryType.GENERAL.value,
+        "priority": PriorityLevel.MEDIUM.value,
         "intent": "Unknown",
-        "recommended_queue": QueueType.SUPPORT,
+        "recommended_queue": QueueType.SUPPORT.value,
         "confidence": 0.0
     }
     confidence_threshold: float = 0.7  # Reject classifications below this threshold
 
+    # Static instructions and few-shot examples live in a fixed message
+    # prefix: identical across calls, so OpenAI's server-side prompt-prefix
+    # caching reuses the prefill and the per-call user message shrinks to
+    # just product/channel/content.
+    SYSTEM_PROMPT: str = (
+        "You classify customer support messages. Return only JSON "
+        '{"category":"Billing Support|Dispatch Communication|Sensor Alert|Marketing|General Inquiry",'
+        '"intent":"1-3 words","priority":"High|Medium|Low",'
+        '"recommended_queue":"Finance Support|Dispatch Team|Ops Team|Automation|Customer Support",'
+        '"confidence":0.0-1.0}.'
+    )
+    FEW_SHOT_MESSAGES: list = [
+        {
+            "role": "user",
+            "content": "Product: Discovery\nChannel: email\nMessage: My invoice has a double charge for last month."
+        },
+        {
+            "role": "assistant",
+            "content": '{"category": "Billing Support", "intent": "Invoice Dispute", "priority": "High", '
+                       '"recommended_queue": "Finance Support", "confidence": 0.95}'
+        },
+        {
+            "role": "user",
+            "content": "Product: Hauler\nChannel: email\nMessage: When is my pickup scheduled?"
+        },
+        {
+            "role": "assistant",
+            "content": '{"category": "Dispatch Communication", "intent": "Schedule Inquiry", "priority": "Medium", '
+                       '"recommended_queue": "Dispatch Team", "confidence": 0.90}'
+        }
+    ]
+    # Invariant message prefix assembled once; per call only the user
+    # message is appended.
+    MESSAGE_PREFIX: tuple = (
+        {"role": "system", "content": SYSTEM_PROMPT},
+        *FEW_SHOT_MESSAGES
+    )
+
     def __init__(
         self,
         openai_client: Optional[AsyncOpenAI] = None,
-        model: str = "gpt-4",
+        model: str = "gpt-4o-mini",
         fallback_model: str = "gpt-3.5-turbo",
+        escalation_model: str = "gpt-4",
         temperature: float = 0.3,
-        max_tokens: int = 400
+        max_tokens: int = 80,  # The JSON schema fits in well under 80 tokens
+        speculative: bool = True,
+        micro_batch: bool = False,
+        batch_window: float = 0.02,
+        batch_max: int = 16
     ):
         super().__init__()
         self.model = model
         self.fallback_model = fallback_model
+        # Cascade: the cheap default model handles the bulk of traffic;
+        # low-confidence results re-run once on the stronger model.
+        self.escalation_model = escalation_model
+        self.speculative = speculative  # Race primary and fallback models concurrently
         self.temperature = temperature
         self.max_tokens = max_tokens
-        self.client = openai_client or AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.cache = TTLCache(maxsize=1000, ttl=3600)  # Cache for 1 hour
+        self.request_timeout = float(os.getenv("CLASSIFY_TIMEOUT_S", "8"))
+        # Shared pooled client; its own timeout is the second line of
+        # defense below wait_for.
+        self.client = openai_client or get_async_openai_client(self.request_timeout)
+        # Injected clients are this agent's to close; the cached shared
+        # client is closed once at application shutdown.
+        self._owns_client = openai_client is not None
+        self.cache = TTLCache(maxsize=2000, ttl=3600)  # Cache for 1 hour
+        self.semantic_cache = SemanticCache()  # Near-match tier; no-op without embeddings
 
-        if not os.getenv("OPENAI_API_KEY"):
+        # Micro-batching: coalesce classifications arriving within
+        # batch_window seconds into one LLM call. Off by default — a lone
+        # request would wait out the window — but worth it under sustained
+        # concurrency where one RTT replaces up to batch_max of them.
+        self.micro_batch = micro_batch
+        self.batch_window = batch_window
+        self.batch_max = batch_max
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batcher_task: Optional[asyncio.Task] = None
+
+        if not OPENAI_API_KEY:
             raise EnvironmentError("OPENAI_API_KEY not set")
 
     def preprocess(self, input_data: AgentInput) -> None:
@@ -58,125 +226,389 @@ class ClassificationAgent(BaseAgent):
 
     async def run(self, input_data: AgentInput) -> AgentOutput:
         content = self._sanitize(input_data["content"])
-        cache_key = f"{content}:{self.model}"
+
+        # Tier 0: deterministic keyword rules — no network, no cache needed
+        rule = classify_message({
+            "content": content,
+            "product": input_data.get("metadata", {}).get("product", "")
+        })
+        if rule["confidence"] >= self.confidence_threshold:
+            logger.info("[ClassificationAgent] Rule-based match: %s", rule["category"])
+            return {**rule, "fallback_used": False, "error": None}
+
+        cache_key = self._cache_key(content)
 
         # Check cache
         if cache_key in self.cache:
-            logger.info(f"[ClassificationAgent] Cache hit for: {cache_key[:50]}...")
+            logger.info("[ClassificationAgent] Cache hit for: %.50s...", content)
             return self.cache[cache_key]
 
+        # Second tier: serve paraphrased duplicates without an LLM call
+        semantic_hit = await self.semantic_cache.get(content)
+        if semantic_hit is not None:
+            logger.info("[ClassificationAgent] Semantic cache hit for: %.50s...", content)
+            self.cache[cache_key] = semantic_hit
+            return semantic_hit
+
         prompt = self._build_prompt(content, input_data.get("metadata", {}))
 
         try:
-            result = await self._try_classify(content, prompt, self.model)
+            if self.micro_batch:
+                result = await self._enqueue_for_batch(prompt)
+            elif self.speculative:
+                result = await self._classify_speculative(content, prompt)
+            else:
+                result = await self._try_classify(content, prompt, self.model)
             if result["confidence"] < self.confidence_threshold:
-                logger.warning(f"[ClassificationAgent] Confidence {result['confidence']} below threshold {self.confidence_threshold}")
-                raise ValueError("Classification confidence too low")
+                logger.warning(
+                    "[ClassificationAgent] Confidence %s below threshold %s; escalating to %s",
+                    result["confidence"], self.confidence_threshold, self.escalation_model
+                )
+                result = await self._try_classify(content, prompt, self.escalation_model)
+                if result["confidence"] < self.confidence_threshold:
+                    raise ValueError("Classification confidence too low")
+                logger.info("[ClassificationAgent] Escalated classification accepted")
             self.cache[cache_key] = result
+            await self.semantic_cache.add(content, result)
             return result
-        except (AuthenticationError, RateLimitError, OpenAIError) as api_err:
-            logger.warning(f"[ClassificationAgent] OpenAI error with {self.model}: {str(api_err)}. Falling back to {self.fallback_model}")
+        except (AuthenticationError, RateLimitError, OpenAIError, asyncio.TimeoutError) as api_err:
+            logger.warning("[ClassificationAgent] OpenAI error with %s: %s. Falling back to %s", self.model, api_err, self.fallback_model)
             try:
                 result = await self._try_classify(content, prompt, self.fallback_model)
                 if result["confidence"] < self.confidence_threshold:
                     raise ValueError("Fallback classification confidence too low")
                 self.cache[cache_key] = result
+                await self.semantic_cache.add(content, result)
                 return result
             except Exception as e:
-                logger.error(f"[ClassificationAgent] Fallback failed: {str(e)}")
+                logger.error("[ClassificationAgent] Fallback failed: %s", e)
                 raise
         except Exception as e:
             logger.exception("[ClassificationAgent] Unexpected error")
             raise
 
+    async def run_batch(self, inputs: list) -> list:
+        """
+        Classifies many messages with a single LLM call. Unlike the
+        opportunistic micro-batcher this takes an explicit batch, which
+        suits RPM-limited accounts: one request covers len(inputs)
+        messages and the static prompt prefix is amortized across them.
+        Falls back to the full tiered run() path for a single input.
+
+        Each item first goes through the same no-LLM tiers as run() —
+        keyword rules, exact cache, semantic cache — and only the residue
+        is sent upstream. Batched classifications are written back to
+        both caches so they serve later singles and batches. Results
+        keep the input order.
+        """
+        if not inputs:
+            return []
+        if len(inputs) == 1:
+            return [await self.run(inputs[0])]
+
+        results: list = [None] * len(inputs)
+        residue: list = []  # (index, content, cache_key, prompt) tuples
+        for index, item in enumerate(inputs):
+            content = self._sanitize(item["content"])
+
+            rule = classify_message({
+                "content": content,
+                "product": item.get("metadata", {}).get("product", "")
+            })
+            if rule["confidence"] >= self.confidence_threshold:
+                results[index] = {**rule, "fallback_used": False, "error": None}
+                continue
+
+            cache_key = self._cache_key(content)
+            if cache_key in self.cache:
+                results[index] = self.cache[cache_key]
+                continue
+
+            semantic_hit = await self.semantic_cache.get(content)
+            if semantic_hit is not None:
+                self.cache[cache_key] = semantic_hit
+                results[index] = semantic_hit
+                continue
+
+            residue.append((
+                index, content, cache_key,
+                self._build_prompt(content, item.get("metadata", {}))
+            ))
+
+        if len(residue) < len(inputs):
+            logger.info(
+                "[ClassificationAgent] Batch: %d/%d served without the LLM",
+                len(inputs) - len(residue), len(inputs)
+            )
+        if residue:
+            classified = await self._classify_batch([prompt for *_, prompt in residue])
+            for (index, content, cache_key, _), result in zip(residue, classified):
+                self.cache[cache_key] = result
+                await self.semantic_cache.add(content, result)
+                results[index] = result
+        return results
+
+    async def run_batch_job(self, inputs: list, poll_interval: float = 30.0) -> list:
+        """
+        Classifies a large backlog through the OpenAI Batch API. Requests
+        are uploaded as one JSONL file and processed offline at half the
+        synchronous token price, outside the account's RPM budget —
+        suited to overnight re-classification runs, not live traffic
+        (completion can take up to 24h). Results are matched back to
+        inputs by custom_id, so output order from the API doesn't matter.
+        """
+        if not inputs:
+            return []
+        lines = []
+        for i, item in enumerate(inputs):
+            prompt = self._build_prompt(self._sanitize(item["content"]), item.get("metadata", {}))
+            lines.append(orjson.dumps({
+                "custom_id": f"msg-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": [*self.MESSAGE_PREFIX, {"role": "user", "content": prompt}],
+                    "temperature": self.temperature,
+                    "max_tokens": self.max_tokens,
+                    "response_format": {"type": "json_object"}
+                }
+            }))
+
+        batch_file = await self.client.files.create(
+            file=("classify_batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info("[ClassificationAgent] Batch job %s submitted with %d messages", batch.id, len(inputs))
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch job {batch.id} ended with status: {batch.status}")
+
+        output = await self.client.files.content(batch.output_file_id)
+        results: list = [None] * len(inputs)
+        for line in output.content.splitlines():
+            if not line:
+                continue
+            record = orjson.loads(line)
+            index = int(record["custom_id"].split("-", 1)[1])
+            reply = record["response"]["body"]["choices"][0]["message"]["content"].strip()
+            results[index] = self._parse_reply(reply)
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            raise ValueError(f"Batch job {batch.id} returned no result for messages: {missing}")
+        return results
+
+    async def _enqueue_for_batch(self, prompt: str) -> AgentOutput:
+        """
+        Hands the prompt to the micro-batcher and awaits its slot in the
+        next coalesced call. The batcher task is started lazily so the
+        agent can be constructed outside a running event loop.
+        """
+        if self._batch_queue is None:
+            self._batch_queue = asyncio.Queue(maxsize=256)
+            self._batcher_task = asyncio.create_task(self._batcher())
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((prompt, future))
+        return await future
+
+    async def _batcher(self) -> None:
+        """
+        Background coalescing loop: collects prompts for up to
+        batch_window seconds (or batch_max entries) after the first
+        arrival, issues one LLM call for the lot, and resolves each
+        caller's future in order.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            prompt, future = await self._batch_queue.get()
+            batch = [(prompt, future)]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_max:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._batch_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await self._classify_batch([p for p, _ in batch])
+                for (_, fut), result in zip(batch, results):
+                    if not fut.done():
+                        fut.set_result(result)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    async def _classify_batch(self, prompts: list) -> list:
+        """Classifies several prompts with a single chat completion."""
+        logger.info("[ClassificationAgent] Micro-batch of %d classifications", len(prompts))
+        numbered = "\n\n".join(f"Message {i + 1}:\n{p}" for i, p in enumerate(prompts))
+        user_message = (
+            f"Classify each of the {len(prompts)} messages below. Return a JSON object "
+            '{"results": [...]} with one classification object per message, in order.\n\n'
+            f"{numbered}"
+        )
+        response = await asyncio.wait_for(
+            self.client.chat.completions.create(
+                model=self.model,
+                messages=[*self.MESSAGE_PREFIX, {"role": "user", "content": user_message}],
+                temperature=self.temperature,
+                max_tokens=self.max_tokens * len(prompts),
+                response_format={"type": "json_object"}
+            ),
+            timeout=self.request_timeout
+        )
+        reply = response.choices[0].message.content.strip()
+        items = orjson.loads(reply).get("results", [])
+        if len(items) != len(prompts):
+            raise ValueError(f"Batched reply had {len(items)} results for {len(prompts)} messages")
+        return [self._validate_result(item) for item in items]
+
+    async def _classify_speculative(self, content: str, prompt: str) -> AgentOutput:
+        """
+        Races the primary and fallback models concurrently and returns the
+        first above-threshold result, cancelling the loser. Worst-case
+        latency drops from L_primary + L_fallback (sequential retry) to
+        min(L_primary, L_fallback). If neither clears the threshold, the
+        highest-confidence result wins; if both fail, the last error is
+        re-raised so the caller's fallback handling still applies.
+        """
+        tasks = {
+            asyncio.create_task(self._try_classify(content, prompt, self.model)),
+            asyncio.create_task(self._try_classify(content, prompt, self.fallback_model))
+        }
+        best: Optional[AgentOutput] = None
+        last_error: Optional[Exception] = None
+
+        pending = tasks
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    continue
+                result = task.result()
+                if result["confidence"] >= self.confidence_threshold:
+                    for leftover in pending:
+                        leftover.cancel()
+                    return result
+                if best is None or result["confidence"] > best["confidence"]:
+                    best = result
+
+        if best is not None:
+            return best
+        raise last_error
+
     async def _try_classify(self, content: str, prompt: str, model: str) -> AgentOutput:
-        logger.info(f"[ClassificationAgent] Sending to LLM (model: {model})")
+        """
+        Runs one classification attempt under a hard deadline. Without the
+        wait_for, a single stalled upstream request blocks the pipeline
+        indefinitely and dominates P99 latency.
+        """
+        try:
+            return await asyncio.wait_for(
+                self._stream_classify(content, prompt, model),
+                timeout=self.request_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.error("[ClassificationAgent] LLM call timed out after %ss (model: %s)", self.request_timeout, model)
+            raise
+
+    async def _stream_classify(self, content: str, prompt: str, model: str) -> AgentOutput:
+        logger.info("[ClassificationAgent] Sending to LLM (model: %s)", model)
         try:
-            response = await self.client.chat.completions.create(
+            stream = await self.client.chat.completions.create(
                 model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a precise customer support assistant specializing in classifying incoming communications."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
+                messages=[*self.MESSAGE_PREFIX, {"role": "user", "content": prompt}],
                 temperature=self.temperature,
-                max_tokens=self.max_tokens
+                max_tokens=self.max_tokens,
+                response_format={"type": "json_object"},
+                stream=True
             )
-            reply = response.choices[0].message.content.strip()
-            return self._parse_reply(reply)
+            # Parse incrementally: the classification fields arrive in the
+            # first tokens, so return as soon as the object closes instead
+            # of waiting out the full completion.
+            buf = []
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    buf.append(delta)
+                    if "}" in delta:
+                        try:
+                            return self._parse_reply("".join(buf).strip())
+                        except ValueError:
+                            continue  # Object not complete yet; keep streaming
+            finally:
+                await stream.close()
+            return self._parse_reply("".join(buf).strip())
         except Exception as e:
-            logger.error(f"[ClassificationAgent] LLM call failed: {str(e)}")
+            logger.error("[ClassificationAgent] LLM call failed: %s", e)
             raise
 
     def _build_prompt(self, content: str, metadata: Dict[str, Any]) -> str:
-        product = metadata.get("product", "Unknown")
-        return f"""
-Classify the following message into a JSON object with these fields:
-- category: One of [Billing Support, Dispatch Communication, Sensor Alert, Marketing, General Inquiry]
-- intent: A short 1-3 word summary of the message's main intent
-- priority: One of [High, Medium, Low]
-- recommended_queue: One of [Finance Support, Dispatch Team, Ops Team, Automation, Customer Support]
-- confidence: Float between 0.0 and 1.0 representing your certainty
-
-Context:
-- Product: {product}
-- Channel: {metadata.get('channel', 'unknown')}
-
-Few-shot examples:
-1. Message: "My invoice has a double charge for last month."
-   ```json
-   {{
-       "category": "Billing Support",
-       "intent": "Invoice Dispute",
-       "priority": "High",
-       "recommended_queue": "Finance Support",
-       "confidence": 0.95
-   }}
-   ```
-2. Message: "When is my pickup scheduled?"
-   ```json
-   {{
-       "category": "Dispatch Communication",
-       "intent": "Schedule Inquiry",
-       "priority": "Medium",
-       "recommended_queue": "Dispatch Team",
-       "confidence": 0.90
-   }}
-   ```
-
-Message:
-\"\"\"
-{content}
-\"\"\"
-Return only the JSON object. Do not explain.
-"""
+        return _PROMPT_TEMPLATE.format_map({
+            "product": metadata.get("product", "Unknown"),
+            "channel": metadata.get("channel", "unknown"),
+            "content": content
+        })
 
     def _parse_reply(self, reply: str) -> AgentOutput:
         try:
-            data = json.loads(reply) if reply.startswith('{') else {}
-            result = {
-                "category": data.get("category", self.fallback_config["category"]),
-                "priority": data.get("priority", self.fallback_config["priority"]),
-                "intent": data.get("intent", self.fallback_config["intent"]),
-                "recommended_queue": data.get("recommended_queue", self.fallback_config["recommended_queue"]),
-                "confidence": float(data.get("confidence", self.fallback_config["confidence"])),
-                "fallback_used": False,
-                "error": None
-            }
-            # Validate enums
-            if result["category"] not in [e.value for e in CategoryType]:
-                raise ValueError(f"Invalid category: {result['category']}")
-            if result["priority"] not in [e.value for e in PriorityLevel]:
-                raise ValueError(f"Invalid priority: {result['priority']}")
-            if result["recommended_queue"] not in [e.value for e in QueueType]:
-                raise ValueError(f"Invalid queue: {result['recommended_queue']}")
-            return result
-        except Exception as e:
-            logger.warning(f"[ClassificationAgent] Failed to parse LLM reply: {reply}")
+            # Parse + validate fused in one pydantic-core pass;
+            # response_format=json_object guarantees a bare JSON reply.
+            return self._as_output(ClassifyResult.model_validate_json(reply))
+        except (ValueError, TypeError) as e:
+            logger.warning("[ClassificationAgent] Failed to parse LLM reply: %s", reply)
             raise ValueError(f"Invalid LLM response: {str(e)}")
 
+    def _validate_result(self, data: Dict[str, Any]) -> AgentOutput:
+        return self._as_output(ClassifyResult.model_validate(data))
+
+    def _as_output(self, parsed: ClassifyResult) -> AgentOutput:
+        # use_enum_values means the fields are already plain value strings.
+        return {
+            "category": parsed.category,
+            "priority": parsed.priority,
+            "intent": parsed.intent,
+            "recommended_queue": parsed.recommended_queue,
+            "confidence": parsed.confidence,
+            "fallback_used": False,
+            "error": None
+        }
+
+    def _cache_key(self, content: str) -> bytes:
+        """
+        Builds a compact 16-byte cache key from the sanitized content.
+        Content is lowercased and whitespace-collapsed before hashing so
+        trivial variants of the same message hit the same entry, and the
+        model name is mixed in via BLAKE2b personalization so entries from
+        different models never collide.
+        """
+        normalized = " ".join(content.lower().split())
+        return blake2b(
+            normalized.encode("utf-8"),
+            digest_size=16,
+            person=self.model.encode("utf-8")[:16]
+        ).digest()
+
     def _sanitize(self, text: str) -> str:
-        clean = text.replace("\n", " ").replace("\r", "").strip()
-        return clean[:2000]
+        # Slice before translating so the cleanup never touches bytes
+        # beyond the 2000-char prompt budget, then enforce the real token
+        # budget with the model's tokenizer.
+        clean = text[:2000].translate(_SANITIZE_TABLE).strip()
+        return truncate_to_tokens(clean, self.model)
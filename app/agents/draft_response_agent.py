@@ -1,15 +1,33 @@
 import os
-import json
 import asyncio
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Callable, Optional
 from cachetools import TTLCache
-from openai import AsyncOpenAI, OpenAIError, AuthenticationError, RateLimitError
-from dotenv import load_dotenv
+from openai import AsyncOpenAI, OpenAIError, AuthenticationError, RateLimitError, APITimeoutError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+from app.config import OPENAI_API_KEY, get_async_openai_client
 from app.agents.base_agent import BaseAgent, AgentInput, AgentOutput
+from app.agents.classify_agent import _SANITIZE_TABLE
+from app.utils.tokens import truncate_to_tokens
 from app.utils.logger import logger
 from app.agents.enums import PriorityLevel, CategoryType, QueueType
 
-load_dotenv()
+# Category -> reply tone, keyed by the plain enum values that
+# classification results actually carry. Hoisted to module scope so the
+# dict is built once, not per draft.
+_TONE_MAP = {
+    CategoryType.BILLING.value: "reassuring and precise",
+    CategoryType.SENSOR.value: "calm and technically confident",
+    CategoryType.DISPATCH.value: "prompt and respectful",
+    CategoryType.MARKETING.value: "brief and compliant",
+    CategoryType.GENERAL.value: "neutral and helpful"
+}
+
+
+@lru_cache(maxsize=None)
+def _infer_tone(category: str) -> str:
+    return _TONE_MAP.get(category, "neutral and helpful")
+
 
 class DraftResponseInput(AgentInput, total=False):
     classification: Dict[str, Any]
@@ -26,31 +44,61 @@ class DraftResponseAgent(BaseAgent):
     version: str = "2.0.0"
     fallback_config: Dict[str, Any] = {
         "reply_draft": "Thank you for your message. We are reviewing your request and will follow up shortly.",
-        "category": CategoryType.GENERAL,
-        "priority": PriorityLevel.MEDIUM,
+        "category": CategoryType.GENERAL.value,
+        "priority": PriorityLevel.MEDIUM.value,
         "intent": "Unknown",
-        "recommended_queue": QueueType.SUPPORT,
+        "recommended_queue": QueueType.SUPPORT.value,
         "confidence": 0.0
     }
     confidence_threshold: float = 0.7
 
+    # Instructions and few-shot examples live in a byte-stable system
+    # message so OpenAI's prompt caching can reuse the prefill across
+    # calls; nothing dynamic is interpolated into it.
+    SYSTEM_PROMPT: str = (
+        "You are a professional customer support assistant crafting clear, empathetic, "
+        "and concise email replies. Craft a concise reply (100-150 words) in the requested tone. "
+        "Do not include headers, disclaimers, or signatures. Return only the response text.\n\n"
+        "Examples:\n"
+        "1. Category: Billing Support, Intent: Invoice Dispute, Tone: reassuring and precise\n"
+        '   Message: "My invoice has a double charge for last month."\n'
+        '   Reply: "Thank you for bringing this to our attention. We apologize for the inconvenience. '
+        "Our finance team is reviewing your invoice and will resolve the double charge promptly. "
+        'You\'ll hear back within 24 hours."\n'
+        "2. Category: Dispatch Communication, Intent: Schedule Inquiry, Tone: prompt and respectful\n"
+        '   Message: "When is my pickup scheduled?"\n'
+        '   Reply: "Thank you for reaching out. Your pickup is scheduled for [insert date/time]. '
+        "Our dispatch team will confirm 24 hours prior. Please let us know if you need to adjust "
+        'the schedule."'
+    )
+
     def __init__(
         self,
         openai_client: Optional[AsyncOpenAI] = None,
         model: str = "gpt-4",
         fallback_model: str = "gpt-3.5-turbo",
         temperature: float = 0.4,
-        max_tokens: int = 300
+        max_tokens: int = 220,  # 150-word replies fit comfortably; caps cost and tail latency
+        on_token: Optional[Callable[[str], None]] = None
     ):
         super().__init__()
         self.model = model
         self.fallback_model = fallback_model
         self.temperature = temperature
         self.max_tokens = max_tokens
-        self.client = openai_client or AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # Invoked with each streamed token so UIs/SSE consumers can render
+        # the draft while it is still generating.
+        self.on_token = on_token
+        # Hard per-request deadline; a hung stream otherwise holds the
+        # caller open for the transport's full default timeout.
+        self.request_timeout = float(os.getenv("DRAFT_TIMEOUT_S", "15"))
+        self.client = openai_client or get_async_openai_client(self.request_timeout)
+        # Injected clients are this agent's to close; the cached shared
+        # client is closed once at application shutdown.
+        self._owns_client = openai_client is not None
         self.cache = TTLCache(maxsize=1000, ttl=3600)  # Cache for 1 hour
 
-        if not os.getenv("OPENAI_API_KEY"):
+        if not OPENAI_API_KEY:
             raise EnvironmentError("OPENAI_API_KEY not set")
 
     def preprocess(self, input_data: DraftResponseInput) -> None:
@@ -71,21 +119,21 @@ class DraftResponseAgent(BaseAgent):
 
         # Check cache
         if cache_key in self.cache:
-            logger.info(f"[DraftResponseAgent] Cache hit for: {cache_key[:50]}...")
+            logger.info("[DraftResponseAgent] Cache hit for: %.50s...", cache_key)
             return self.cache[cache_key]
 
-        tone = self._infer_tone(classification)
+        tone = _infer_tone(classification.get("category", CategoryType.GENERAL.value))
         prompt = self._build_prompt(content, classification, tone)
 
         try:
             result = await self._try_draft(content, prompt, classification, self.model)
             if result["confidence"] < self.confidence_threshold:
-                logger.warning(f"[DraftResponseAgent] Confidence {result['confidence']} below threshold {self.confidence_threshold}")
+                logger.warning("[DraftResponseAgent] Confidence %s below threshold %s", result["confidence"], self.confidence_threshold)
                 raise ValueError("Draft confidence too low")
             self.cache[cache_key] = result
             return result
         except (AuthenticationError, RateLimitError, OpenAIError) as api_err:
-            logger.warning(f"[DraftResponseAgent] OpenAI error with {self.model}: {str(api_err)}. Falling back to {self.fallback_model}")
+            logger.warning("[DraftResponseAgent] OpenAI error with %s: %s. Falling back to %s", self.model, api_err, self.fallback_model)
             try:
                 result = await self._try_draft(content, prompt, classification, self.fallback_model)
                 if result["confidence"] < self.confidence_threshold:
@@ -93,28 +141,68 @@ class DraftResponseAgent(BaseAgent):
                 self.cache[cache_key] = result
                 return result
             except Exception as e:
-                logger.error(f"[DraftResponseAgent] Fallback failed: {str(e)}")
+                logger.error("[DraftResponseAgent] Fallback failed: %s", e)
                 raise
         except Exception as e:
             logger.exception("[DraftResponseAgent] Unexpected error")
             raise
 
     async def _try_draft(self, content: str, prompt: str, classification: Dict[str, Any], model: str) -> DraftResponseOutput:
-        logger.info(f"[DraftResponseAgent] Generating draft with model: {model}")
+        return await self._draft_with_retry(content, prompt, classification, model)
+
+    # Retry only the transient failure modes (throttling, timeouts) with
+    # jittered exponential backoff so concurrent retries don't re-stampede
+    # the API; auth and validation errors surface immediately. The
+    # deadline applies per attempt, not across the retry loop — an
+    # overall budget would be eaten by the backoff waits and kill the
+    # later attempts before they start.
+    @retry(
+        retry=retry_if_exception_type((RateLimitError, APITimeoutError, asyncio.TimeoutError)),
+        stop=stop_after_attempt(3),
+        wait=wait_random_exponential(multiplier=1, max=10),
+        reraise=True
+    )
+    async def _draft_with_retry(self, content: str, prompt: str, classification: Dict[str, Any], model: str) -> DraftResponseOutput:
+        return await asyncio.wait_for(
+            self._draft_once(content, prompt, classification, model),
+            timeout=self.request_timeout
+        )
+
+    async def _draft_once(self, content: str, prompt: str, classification: Dict[str, Any], model: str) -> DraftResponseOutput:
+        logger.info("[DraftResponseAgent] Generating draft with model: %s", model)
         try:
-            response = await self.client.chat.completions.create(
+            stream = await self.client.chat.completions.create(
                 model=model,
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a professional customer support assistant crafting clear, empathetic, and concise email replies."
-                    },
+                    {"role": "system", "content": self.SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=self.temperature,
-                max_tokens=self.max_tokens
+                max_tokens=self.max_tokens,
+                stream=True
             )
-            reply = response.choices[0].message.content.strip()
+            parts = []
+            finish_reason = None
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    if choice.finish_reason is not None:
+                        finish_reason = choice.finish_reason
+                    delta = choice.delta.content
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    if self.on_token is not None:
+                        self.on_token(delta)
+            finally:
+                await stream.close()
+            if finish_reason == "length":
+                # The budget is sized for the 100-150 word format; hitting
+                # it means the draft was cut off mid-sentence.
+                logger.warning("[DraftResponseAgent] Draft truncated at max_tokens=%d (model: %s)", self.max_tokens, model)
+            reply = "".join(parts).strip()
             output: DraftResponseOutput = {
                 "reply_draft": self._process_reply(reply),
                 "confidence": classification.get("confidence", 0.85),
@@ -127,49 +215,22 @@ class DraftResponseAgent(BaseAgent):
             }
             return output
         except Exception as e:
-            logger.error(f"[DraftResponseAgent] LLM call failed: {str(e)}")
+            logger.error("[DraftResponseAgent] LLM call failed: %s", e)
             raise
 
     def _build_prompt(self, content: str, classification: Dict[str, Any], tone: str) -> str:
         product = classification.get("metadata", {}).get("product", "Unknown")
-        return f"""
-You are an AI assistant trained to write clear, empathetic, and professional email replies for customer support.
-
-Context:
-- Category: {classification.get('category')}
-- Intent: {classification.get('intent')}
-- Tone: {tone}
-- Product: {product}
-
-Few-shot examples:
-1. Category: Billing Support, Intent: Invoice Dispute, Tone: reassuring and precise
-   Message: "My invoice has a double charge for last month."
-   Reply: "Thank you for bringing this to our attention. We apologize for the inconvenience. Our finance team is reviewing your invoice and will resolve the double charge promptly. You'll hear back within 24 hours."
-2. Category: Dispatch Communication, Intent: Schedule Inquiry, Tone: prompt and respectful
-   Message: "When is my pickup scheduled?"
-   Reply: "Thank you for reaching out. Your pickup is scheduled for [insert date/time]. Our dispatch team will confirm 24 hours prior. Please let us know if you need to adjust the schedule."
-
-Client's message:
-\"\"\"
-{content}
-\"\"\"
-Craft a concise reply (100-150 words) in the specified tone. Do not include headers, disclaimers, or signatures. Return only the response text.
-"""
-
-    def _infer_tone(self, classification: Dict[str, str]) -> str:
-        category = classification.get("category", CategoryType.GENERAL)
-        tone_map = {
-            CategoryType.BILLING: "reassuring and precise",
-            CategoryType.SENSOR: "calm and technically confident",
-            CategoryType.DISPATCH: "prompt and respectful",
-            CategoryType.MARKETING: "brief and compliant",
-            CategoryType.GENERAL: "neutral and helpful"
-        }
-        return tone_map.get(category, "neutral and helpful")
+        return (
+            f"Category: {classification.get('category')}\n"
+            f"Intent: {classification.get('intent')}\n"
+            f"Tone: {tone}\n"
+            f"Product: {product}\n"
+            f"Message: {content}"
+        )
 
     def _sanitize(self, text: str) -> str:
-        clean = text.replace("\n", " ").replace("\r", "").strip()
-        return clean[:2000]
+        clean = text[:2000].translate(_SANITIZE_TABLE).strip()
+        return truncate_to_tokens(clean, self.model)
 
     def _process_reply(self, reply: str) -> str:
         clean_reply = reply.strip()[:1000]
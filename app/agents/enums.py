@@ -0,0 +1,36 @@
+import sys
+from enum import Enum
+
+# ---------------- Enums for Type Safety ----------------
+# Canonical home for the routing vocabulary shared by all agents.
+
+
+class PriorityLevel(str, Enum):
+    HIGH = "High"
+    MEDIUM = "Medium"
+    LOW = "Low"
+
+
+class CategoryType(str, Enum):
+    BILLING = "Billing Support"
+    DISPATCH = "Dispatch Communication"
+    SENSOR = "Sensor Alert"
+    MARKETING = "Marketing"
+    GENERAL = "General Inquiry"
+
+
+class QueueType(str, Enum):
+    FINANCE = "Finance Support"
+    DISPATCH = "Dispatch Team"
+    OPS = "Ops Team"
+    AUTOMATION = "Automation"
+    SUPPORT = "Customer Support"
+
+
+# Intern the enum value strings: they flow through result dicts and
+# membership checks on every message, and orjson interns the strings it
+# decodes, so interned values let those comparisons short-circuit on
+# object identity instead of character-by-character equality.
+for _enum in (PriorityLevel, CategoryType, QueueType):
+    for _member in _enum:
+        sys.intern(_member.value)
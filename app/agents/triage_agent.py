@@ -0,0 +1,146 @@
+import os
+import asyncio
+from hashlib import blake2b
+from typing import Dict, Any, Optional
+import orjson
+from cachetools import TTLCache
+from openai import AsyncOpenAI
+from app.config import OPENAI_API_KEY, get_async_openai_client
+from app.agents.base_agent import BaseAgent, AgentInput, AgentOutput
+from app.agents.classify_agent import _CATEGORY_VALUES, _PRIORITY_VALUES, _QUEUE_VALUES, _SANITIZE_TABLE
+from app.utils.tokens import truncate_to_tokens
+from app.utils.logger import logger
+from app.agents.enums import PriorityLevel, CategoryType, QueueType
+
+
+class TriageOutput(AgentOutput):
+    reply_draft: str
+
+
+class TriageAgent(BaseAgent):
+    """
+    AI agent that classifies a message AND drafts a reply in one LLM call.
+    Fusing the two steps halves API round trips and amortizes the shared
+    system preamble; use the separate Classification/DraftResponse agents
+    when only one half is wanted (e.g. classify-only for spam).
+    """
+    name: str = "TriageAgent"
+    version: str = "1.0.0"
+    fallback_config: Dict[str, Any] = {
+        "reply_draft": "Thank you for your message. We are reviewing your request and will follow up shortly.",
+        "category": CategoryType.GENERAL.value,
+        "priority": PriorityLevel.MEDIUM.value,
+        "intent": "Unknown",
+        "recommended_queue": QueueType.SUPPORT.value,
+        "confidence": 0.0
+    }
+    confidence_threshold: float = 0.7
+
+    SYSTEM_PROMPT: str = (
+        "You triage customer support messages: classify the message and draft a reply. "
+        "Return only JSON {"
+        '"category":"Billing Support|Dispatch Communication|Sensor Alert|Marketing|General Inquiry",'
+        '"intent":"1-3 words","priority":"High|Medium|Low",'
+        '"recommended_queue":"Finance Support|Dispatch Team|Ops Team|Automation|Customer Support",'
+        '"confidence":0.0-1.0,'
+        '"reply_draft":"a clear, empathetic 100-150 word reply with no headers or signatures"}.'
+    )
+
+    def __init__(
+        self,
+        openai_client: Optional[AsyncOpenAI] = None,
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.4,
+        max_tokens: int = 400
+    ):
+        super().__init__()
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.request_timeout = float(os.getenv("CLASSIFY_TIMEOUT_S", "8"))
+        self.client = openai_client or get_async_openai_client(self.request_timeout)
+        # Injected clients are this agent's to close; the cached shared
+        # client is closed once at application shutdown.
+        self._owns_client = openai_client is not None
+        self.cache = TTLCache(maxsize=1000, ttl=3600)  # Cache for 1 hour
+
+        if not OPENAI_API_KEY:
+            raise EnvironmentError("OPENAI_API_KEY not set")
+
+    def preprocess(self, input_data: AgentInput) -> None:
+        if not input_data.get("content"):
+            raise ValueError("Missing message content")
+        if len(input_data["content"].strip()) < 10:
+            raise ValueError("Content too short for meaningful triage")
+
+    async def run(self, input_data: AgentInput) -> TriageOutput:
+        content = self._sanitize(input_data["content"])
+        cache_key = self._cache_key(content)
+
+        if cache_key in self.cache:
+            logger.info("[TriageAgent] Cache hit for: %.50s...", content)
+            return self.cache[cache_key]
+
+        metadata = input_data.get("metadata", {})
+        prompt = (
+            f"Product: {metadata.get('product', 'Unknown')}\n"
+            f"Channel: {metadata.get('channel', 'unknown')}\n"
+            f"Message: {content}"
+        )
+
+        logger.info("[TriageAgent] Sending to LLM (model: %s)", self.model)
+        response = await asyncio.wait_for(
+            self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                response_format={"type": "json_object"}
+            ),
+            timeout=self.request_timeout
+        )
+        reply = response.choices[0].message.content.strip()
+        result = self._parse_reply(reply)
+        if result["confidence"] < self.confidence_threshold:
+            raise ValueError("Triage confidence too low")
+        self.cache[cache_key] = result
+        return result
+
+    def _parse_reply(self, reply: str) -> TriageOutput:
+        try:
+            data = orjson.loads(reply)
+            result: TriageOutput = {
+                "reply_draft": str(data.get("reply_draft", self.fallback_config["reply_draft"]))[:1000],
+                "category": data.get("category", self.fallback_config["category"]),
+                "priority": data.get("priority", self.fallback_config["priority"]),
+                "intent": data.get("intent", self.fallback_config["intent"]),
+                "recommended_queue": data.get("recommended_queue", self.fallback_config["recommended_queue"]),
+                "confidence": float(data.get("confidence", self.fallback_config["confidence"])),
+                "fallback_used": False,
+                "error": None
+            }
+            if result["category"] not in _CATEGORY_VALUES:
+                raise ValueError(f"Invalid category: {result['category']}")
+            if result["priority"] not in _PRIORITY_VALUES:
+                raise ValueError(f"Invalid priority: {result['priority']}")
+            if result["recommended_queue"] not in _QUEUE_VALUES:
+                raise ValueError(f"Invalid queue: {result['recommended_queue']}")
+            return result
+        except (orjson.JSONDecodeError, ValueError, TypeError) as e:
+            logger.warning("[TriageAgent] Failed to parse LLM reply: %s", reply)
+            raise ValueError(f"Invalid LLM response: {str(e)}")
+
+    def _cache_key(self, content: str) -> bytes:
+        normalized = " ".join(content.lower().split())
+        return blake2b(
+            normalized.encode("utf-8"),
+            digest_size=16,
+            person=self.model.encode("utf-8")[:16]
+        ).digest()
+
+    def _sanitize(self, text: str) -> str:
+        clean = text[:2000].translate(_SANITIZE_TABLE).strip()
+        return truncate_to_tokens(clean, self.model)
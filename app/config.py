@@ -0,0 +1,25 @@
+import os
+from functools import cache
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+from app.utils.http_client import shared_async_client
+
+# .env is read and parsed exactly once, here. Agent modules import the
+# resolved values instead of each re-running load_dotenv() at import
+# time (one filesystem walk per module during cold start).
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+
+@cache
+def get_async_openai_client(timeout: float = 8.0) -> AsyncOpenAI:
+    """
+    Returns a process-wide AsyncOpenAI client (one per distinct timeout)
+    over the shared HTTP/2 connection pool.
+    """
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=shared_async_client,
+        timeout=timeout
+    )
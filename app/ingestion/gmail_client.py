@@ -1,4 +1,7 @@
-from typing import Dict, Any
+from collections import deque
+from typing import Any, Dict, List, Optional
+import httpx
+from app.utils.http_client import shared_async_client
 from app.utils.logger import logger
 
 class GmailClient:
@@ -7,10 +10,16 @@ class GmailClient:
     In a production environment, this would integrate with Google Gmail API using OAuth2.
     """
     
-    def __init__(self):
+    def __init__(self, http: Optional[httpx.AsyncClient] = None):
         """Initialize the mock Gmail client."""
         logger.info("[GmailClient] Initialized mock Gmail client")
-        self.mock_emails = [
+        # The real Gmail API branch issues requests over this pooled
+        # client (shared keep-alive connections, no per-call TLS
+        # handshake) instead of opening a fresh connection per fetch.
+        self.http = http or shared_async_client
+        # A deque keeps consumption O(1) from the front; the real Gmail
+        # paging integration will drain this the same way.
+        self.mock_emails = deque([
             {
                 "sender": "mock.sender@gmail.com",
                 "subject": "Invoice Issue",
@@ -27,8 +36,8 @@ class GmailClient:
                 "labels": ["INBOX"],
                 "timestamp": "2025-07-10T12:05:00Z"
             }
-        ]
-    
+        ])
+
     def fetch_latest_email(self) -> Dict[str, Any]:
         """
         Fetches the latest mock email from the simulated inbox.
@@ -46,3 +55,13 @@ class GmailClient:
         email = self.mock_emails[0]  # Simulate fetching the latest email
         logger.info("[GmailClient] Fetched mock email from %s", email["sender"])
         return email
+
+    async def fetch_batch(self, n: int) -> List[Dict[str, Any]]:
+        """
+        Drains up to n emails from the inbox in arrival order. Feeds
+        directly into ClassificationAgent.run_batch; returns fewer than n
+        (possibly zero) emails when the inbox runs dry.
+        """
+        batch = [self.mock_emails.popleft() for _ in range(min(n, len(self.mock_emails)))]
+        logger.info("[GmailClient] Fetched batch of %d mock emails", len(batch))
+        return batch
@@ -1,4 +1,7 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import httpx
+import orjson
+from app.utils.http_client import shared_async_client
 from app.utils.logger import logger
 
 class TwilioClient:
@@ -7,9 +10,11 @@ class TwilioClient:
     In a production environment, this would integrate with Twilio API to fetch voicemail transcriptions.
     """
     
-    def __init__(self):
+    def __init__(self, http: Optional[httpx.AsyncClient] = None):
         """Initialize the mock Twilio client."""
         logger.info("[TwilioClient] Initialized mock Twilio client")
+        # Pooled client for the real Twilio API branch; see GmailClient.
+        self.http = http or shared_async_client
         self.mock_voicemails = [
             {
                 "sender": "+15551234567",
@@ -26,6 +31,10 @@ class TwilioClient:
                 "timestamp": "2025-07-10T12:10:00Z"
             }
         ]
+        # The mock payloads never change after construction, so encode
+        # them once; byte-level consumers can hand the buffer straight to
+        # a Response without a per-call dict copy + JSON encode.
+        self._mock_voicemails_json = [orjson.dumps(v) for v in self.mock_voicemails]
     
     def fetch_latest_voicemail(self) -> Dict[str, Any]:
         """
@@ -44,3 +53,17 @@ class TwilioClient:
         voicemail = self.mock_voicemails[0]  # Simulate fetching the latest voicemail
         logger.info("[TwilioClient] Fetched mock voicemail from %s", voicemail["sender"])
         return voicemail
+
+    def fetch_latest_voicemail_bytes(self) -> bytes:
+        """
+        Returns the latest voicemail as pre-serialized JSON bytes, skipping
+        the decode-then-re-encode round trip for consumers that only
+        forward the payload.
+
+        Raises:
+            ValueError: If no voicemails are available in the mock inbox.
+        """
+        if not self._mock_voicemails_json:
+            logger.error("[TwilioClient] No mock voicemails available")
+            raise ValueError("No voicemails available in mock inbox")
+        return self._mock_voicemails_json[0]
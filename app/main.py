@@ -1,10 +1,14 @@
-from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import FastAPI, Response, status
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from decouple import config, UndefinedValueError
 from app.utils.logger import logger
 from app.routes import messages, webhook
-import uuid
+from app.utils import clock, tokens
+import asyncio
+import secrets
 import os
 
 # Application metadata
@@ -17,12 +21,23 @@ Supports mock ingestion from Gmail and phone sources for demonstration purposes.
 """
 
 # Initialize FastAPI app
+# orjson-backed responses: 2-5x faster encoding than the stdlib
+# serializer with native datetime support, so no custom json_encoders.
 app = FastAPI(
     title=APP_NAME,
     version=APP_VERSION,
-    description=APP_DESCRIPTION
+    description=APP_DESCRIPTION,
+    default_response_class=ORJSONResponse
 )
 
+# Compress larger responses at the cheapest gzip level: level 1 gets
+# most of the ratio on JSON at a fraction of level 9's CPU, and small
+# bodies (health checks, short classifications) skip compression
+# entirely via minimum_size. Note: minimum_size only applies to
+# non-streaming responses — streamed ones must opt out explicitly, as
+# the SSE draft stream does with an identity content-encoding.
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=1)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -32,16 +47,41 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-# Request ID middleware for traceability
-@app.middleware("http")
-async def add_request_id(request: Request, call_next):
-    """Add a unique request ID to each request for logging."""
-    request_id = str(uuid.uuid4())
-    request.state.request_id = request_id
-    logger.info(f"[Request] New request | ID: {request_id} | Path: {request.url.path} | IP: {request.client.host}")
-    response = await call_next(request)
-    response.headers["X-Request-ID"] = request_id
-    return response
+# Request ID middleware for traceability. Pure ASGI rather than
+# BaseHTTPMiddleware: the latter spawns an extra task and anyio stream
+# pair per request just to expose the Request/Response objects, which
+# this middleware never needs.
+class RequestIDMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # token_hex pulls 16 random bytes in one amortized getrandom
+        # call — cheaper than uuid4's per-call object construction, and
+        # request IDs need uniqueness, not RFC 4122 shape.
+        request_id = secrets.token_hex(16)
+        # scope["state"] is what request.state reads from.
+        scope.setdefault("state", {})["request_id"] = request_id
+        client = scope.get("client")
+        logger.info(
+            "[Request] New request | ID: %s | Path: %s | IP: %s",
+            request_id, scope.get("path", ""), client[0] if client else "-"
+        )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append(
+                    (b"x-request-id", request_id.encode())
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+app.add_middleware(RequestIDMiddleware)
 
 # Validate environment variables at startup
 def validate_environment():
@@ -57,17 +97,55 @@ def validate_environment():
     
     if missing_vars:
         error_msg = f"Missing required environment variables: {', '.join(missing_vars)}"
-        logger.error(f"[Startup] {error_msg}")
+        logger.error("[Startup] %s", error_msg)
         raise EnvironmentError(error_msg)
     
     # Log optional variables
     react_api_url = config("REACT_APP_API_BASE_URL", default="http://localhost:8000")
-    logger.info(f"[Startup] REACT_APP_API_BASE_URL: {react_api_url}")
+    logger.info("[Startup] REACT_APP_API_BASE_URL: %s", react_api_url)
 
 # Include routers
 app.include_router(messages.router)
 app.include_router(webhook.router)
 
+def _health_payload() -> bytes:
+    """
+    Encodes the health document; /health just returns the bytes. Reads
+    config() live — this runs once at startup and then every refresh
+    interval, so memoizing the lookups would freeze the key status the
+    refresh task exists to keep current.
+    """
+    return orjson.dumps({
+        "status": "healthy",
+        "app_name": APP_NAME,
+        "app_version": APP_VERSION,
+        "openai_key_configured": bool(config("OPENAI_API_KEY", default=None)),
+        "react_api_url": config("REACT_APP_API_BASE_URL", default="http://localhost:8000"),
+        "timestamp": os.environ.get("CURRENT_TIME", "2025-07-10T13:03:00-04:00")
+    })
+
+async def _refresh_health(interval: float = 5.0) -> None:
+    """Re-encodes the cached health bytes so key status stays current."""
+    while True:
+        await asyncio.sleep(interval)
+        app.state.health_bytes = _health_payload()
+
+async def _ingest_worker(queue: "asyncio.Queue") -> None:
+    """
+    Drains queued webhook payloads through the triage pipeline. A fixed
+    pool of these keeps webhook response latency at queue-admission cost
+    while bounding how much classification work runs concurrently.
+    """
+    from app.services.webhook_handler import process_queued_webhook
+    while True:
+        item = await queue.get()
+        try:
+            await process_queued_webhook(item)
+        except Exception:
+            logger.exception("[IngestWorker] Failed to process queued payload")
+        finally:
+            queue.task_done()
+
 # Health check endpoint
 @app.get("/health", response_model=dict, status_code=status.HTTP_200_OK)
 async def health_check():
@@ -78,17 +156,14 @@ async def health_check():
         dict: Status information including app version and environment details.
     """
     try:
-        return {
-            "status": "healthy",
-            "app_name": APP_NAME,
-            "app_version": APP_VERSION,
-            "openai_key_configured": bool(config("OPENAI_API_KEY", default=None)),
-            "react_api_url": config("REACT_APP_API_BASE_URL", default="http://localhost:8000"),
-            "timestamp": os.environ.get("CURRENT_TIME", "2025-07-10T13:03:00-04:00")
-        }
+        # Load balancers poll this at high frequency; serving cached
+        # pre-encoded bytes makes each hit a lookup + memcpy instead of
+        # dict construction and JSON encoding.
+        body = getattr(app.state, "health_bytes", None) or _health_payload()
+        return Response(content=body, media_type="application/json")
     except Exception as e:
-        logger.error(f"[HealthCheck] Failed: {str(e)}")
-        return JSONResponse(
+        logger.error("[HealthCheck] Failed: %s", e)
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"status": "unhealthy", "error": str(e)}
         )
@@ -97,12 +172,48 @@ async def health_check():
 @app.on_event("startup")
 async def startup_event():
     """Initialize the application and validate environment."""
-    logger.info(f"[Startup] Starting {APP_NAME} v{APP_VERSION}")
+    logger.info("[Startup] Starting %s v%s", APP_NAME, APP_VERSION)
     validate_environment()
+    clock.start()
+    app.state.health_bytes = _health_payload()
+    app.state.health_refresh = asyncio.create_task(_refresh_health())
+    app.state.ingest_queue = asyncio.Queue(maxsize=10_000)
+    app.state.ingest_workers = [
+        asyncio.create_task(_ingest_worker(app.state.ingest_queue))
+        for _ in range(int(os.getenv("INGEST_WORKERS", "4")))
+    ]
+    # Warm both agent singletons off the event loop and in parallel so
+    # client construction and key validation don't tax the first request.
+    await asyncio.gather(
+        asyncio.to_thread(messages.get_draft_agent),
+        asyncio.to_thread(messages.get_classify_agent),
+        asyncio.to_thread(messages.prewarm_models)
+    )
+    # Warm the tokenizers for every configured model: tiktoken fetches
+    # its BPE vocabulary on first use, which otherwise lands on — and
+    # can fail — the first message instead of startup.
+    classify_agent = messages.get_classify_agent()
+    draft_agent = messages.get_draft_agent()
+    await asyncio.to_thread(
+        tokens.prewarm_encoders,
+        classify_agent.model,
+        classify_agent.fallback_model,
+        classify_agent.escalation_model,
+        draft_agent.model,
+        draft_agent.fallback_model,
+    )
     logger.info("[Startup] Application initialized successfully")
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on shutdown."""
-    logger.info(f"[Shutdown] Stopping {APP_NAME} v{APP_VERSION}")
+    clock.stop()
+    refresh = getattr(app.state, "health_refresh", None)
+    if refresh is not None:
+        refresh.cancel()
+    for worker in getattr(app.state, "ingest_workers", []):
+        worker.cancel()
+    from app.utils.http_client import shared_async_client
+    await shared_async_client.aclose()
+    logger.info("[Shutdown] Stopping %s v%s", APP_NAME, APP_VERSION)
@@ -1,6 +1,27 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional, Literal
 from datetime import datetime
+from app.agents.enums import PriorityLevel, CategoryType, QueueType
+from app.utils import clock
+
+
+class ClassifyResult(BaseModel):
+    """
+    Lean wire model for the classification agent's LLM replies. Parsing
+    and validation are fused: model_validate_json reads the raw JSON and
+    enforces the enum/bounds constraints in a single pass inside
+    pydantic-core's Rust layer, replacing a separate parse step plus
+    per-field membership checks. ClassificationResult below remains the
+    richer API-facing model.
+    """
+    model_config = ConfigDict(use_enum_values=True)
+
+    category: CategoryType = CategoryType.GENERAL
+    intent: str = "Unknown"
+    priority: PriorityLevel = PriorityLevel.MEDIUM
+    recommended_queue: QueueType = QueueType.SUPPORT
+    confidence: float = Field(default=0.0, ge=0.0, le=1.0)
+
 
 class ClassificationResult(BaseModel):
     """
@@ -33,7 +54,9 @@ class ClassificationResult(BaseModel):
     )
 
     classified_at: Optional[datetime] = Field(
-        default_factory=datetime.utcnow,
+        # Coarse cached clock: per-instance utcnow() syscalls add up at
+        # high QPS and 10 ms stamp accuracy is plenty here.
+        default_factory=clock.utcnow,
         description="Timestamp when classification occurred"
     )
 
@@ -47,12 +70,16 @@ class ClassificationResult(BaseModel):
         description="Optional error message if fallback or LLM failure occurred"
     )
 
-    @validator("intent")
-    def strip_intent(cls, v):
-        return v.strip().capitalize()
+    @field_validator("intent", mode="after")
+    @classmethod
+    def strip_intent(cls, v: str) -> str:
+        normalized = v.strip().capitalize()
+        # Return the original when it was already normalized so repeat
+        # validations of clean input keep the (likely interned) string.
+        return v if v == normalized else normalized
 
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "category": "Billing Support",
                 "priority": "High",
@@ -64,3 +91,4 @@ class ClassificationResult(BaseModel):
                 "error": None
             }
         }
+    )
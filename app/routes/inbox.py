@@ -5,7 +5,10 @@ from app.agents.classify_agent import classify_message
 router = APIRouter()
 
 @router.post("/classify")
-def classify(msg: Message):
+async def classify(msg: Message):
     """Classify an incoming message using the AI agent"""
-    result = classify_message(msg.content)
+    # classify_message is a non-blocking rule lookup (microseconds of
+    # CPU), so an async handler calls it inline — a sync handler would
+    # pay a threadpool dispatch per request for nothing.
+    result = classify_message({"content": msg.content, "product": msg.product})
     return {"classification": result}
@@ -1,11 +1,14 @@
+import asyncio
 from fastapi import APIRouter, Request, Header, HTTPException, status
 from fastapi.responses import JSONResponse
 from app.services.webhook_handler import handle_webhook
 from app.models.classification_result import ClassificationResult
 from app.utils.logger import logger
-from datetime import datetime
+from app.utils import clock
 from typing import Optional
 
+import orjson
+
 router = APIRouter(prefix="/api/v1/webhooks", tags=["Webhooks"])
 
 @router.post(
@@ -59,7 +62,7 @@ async def webhook_entrypoint(
         HTTPException: For invalid API keys or processing failures.
     """
     try:
-        logger.info(f"[Webhook] Request received at {datetime.utcnow().isoformat()} | IP: {req.client.host}")
+        logger.info("[Webhook] Request received at %s | IP: %s", clock.now_iso(), req.client.host)
         
         # Mock API key validation (for demonstration)
         if x_api_key and x_api_key != "mock-api-key-123":
@@ -67,7 +70,7 @@ async def webhook_entrypoint(
             raise HTTPException(status_code=403, detail="Invalid API key")
         
         classification: ClassificationResult = await handle_webhook(req)
-        logger.info(f"[Webhook] Classification complete: {classification.dict()}")
+        logger.info("[Webhook] Classified as %s / %s", classification.category, classification.intent)
         
         return classification
     except HTTPException as he:
@@ -78,3 +81,34 @@ async def webhook_entrypoint(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Webhook processing failed: {str(e)}"
         )
+
+@router.post(
+    "/incoming/queued",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue an incoming webhook payload for background triage"
+)
+async def webhook_enqueue(
+    req: Request,
+    x_api_key: Optional[str] = Header(None, description="Optional API key for webhook security")
+):
+    """
+    Accepts a webhook payload and hands it to the background worker pool,
+    so the caller's latency is queue admission rather than the full
+    classification pipeline. Returns 202 immediately; use /incoming when
+    the caller needs the classification in the response.
+    """
+    if x_api_key and x_api_key != "mock-api-key-123":
+        logger.warning("[Webhook] Invalid API key provided")
+        raise HTTPException(status_code=403, detail="Invalid API key")
+
+    try:
+        payload = orjson.loads(await req.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    try:
+        req.app.state.ingest_queue.put_nowait(payload)
+    except asyncio.QueueFull:
+        # Backpressure instead of unbounded buffering: tell the sender
+        # to retry rather than let the queue absorb a flood.
+        raise HTTPException(status_code=503, detail="Ingestion queue is full")
+    return {"queued": True}
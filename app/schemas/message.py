@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import Optional, List
 
 class Message(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     sender: str = Field(..., example="customer@example.com")
     subject: Optional[str] = Field(None, example="Invoice discrepancy Q2")
     content: str = Field(..., example="I see a surcharge I don't recognize on invoice #123.")
@@ -1,10 +1,117 @@
 from fastapi import Request, HTTPException
 from app.agents.classify_agent import ClassificationAgent
 from app.models.classification_result import ClassificationResult
+from app.utils import clock
+from app.utils.concurrency import LLM_SEM
 from app.utils.logger import logger
-from datetime import datetime
+import asyncio
+import hashlib
+import re
+from functools import lru_cache
 from typing import Any, Dict
 
+import orjson
+from cachetools import TTLCache
+
+# Exact-match tier in front of the agent: n8n/Zapier retries replay
+# byte-identical payloads, so a hash of the message identity fields
+# turns the whole pipeline into one dict lookup. Volatile fields
+# (timestamps, request metadata) stay out of the key.
+_exact_cache: TTLCache = TTLCache(maxsize=4096, ttl=3600)
+
+# Thread-level tier for Gmail followups: replies in a thread rarely
+# change category or queue, so the last successful classification for a
+# payload-supplied thread_id is reused for the rest of the thread's
+# TTL. Keyed only on IDs the sender actually provided — the extractor's
+# mock default would otherwise collapse every Gmail payload onto one
+# entry.
+_thread_cache: TTLCache = TTLCache(maxsize=2048, ttl=1800)
+
+# Product inference as one compiled alternation instead of a chain of
+# `in` scans: the content is walked once, then the hits are ranked by
+# the historical keyword priority (compactor > pickup > invoice, the
+# order of the original if/elif chain) rather than by position —
+# "fix the invoice for my compactor" is a Pioneer message.
+_PRODUCT_RE = re.compile(r"compactor|pickup|invoice")
+_PRODUCT_PRIORITY = ("compactor", "pickup", "invoice")
+_PRODUCT_BY_KEYWORD = {
+    "compactor": "Pioneer",
+    "pickup": "Hauler",
+    "invoice": "Discovery"
+}
+
+def _payload_key(normalized: Dict[str, Any]) -> str:
+    identity = {
+        "sender": normalized["sender"],
+        "subject": normalized["subject"],
+        "content": normalized["content"],
+        "product": normalized["product"],
+        "channel": normalized["channel"]
+    }
+    # sha256 over canonical JSON; openssl dispatches to SHA extensions
+    # where available, so hashing is effectively free next to an LLM call.
+    return hashlib.sha256(orjson.dumps(identity, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+def _to_classification_result(result_dict: Dict[str, Any]) -> ClassificationResult:
+    """
+    Builds the response model from an agent result dict. The dict has
+    already been validated against ClassifyResult inside the agent, so
+    model_construct skips re-running the Literal/bounds checks; the one
+    thing validation would add — intent normalization — is applied here.
+    """
+    intent = result_dict["intent"]
+    normalized = intent.strip().capitalize()
+    return ClassificationResult.model_construct(
+        category=result_dict["category"],
+        priority=result_dict["priority"],
+        intent=intent if intent == normalized else normalized,
+        recommended_queue=result_dict["recommended_queue"],
+        confidence=result_dict["confidence"],
+        classified_at=clock.utcnow(),
+        fallback_used=bool(result_dict.get("error")),
+        error=result_dict.get("error")
+    )
+
+def _extract_gmail(payload: Dict[str, Any]) -> tuple:
+    sender = payload.get("from") or payload.get("sender") or payload.get("email") or None
+    subject = payload.get("subject") or payload.get("title") or "(no subject)"
+    content = payload.get("message") or payload.get("content") or payload.get("body") or ""
+    metadata = {
+        "thread_id": payload.get("thread_id", "mock-thread-123"),
+        "labels": payload.get("labels", ["INBOX", "UNREAD"]),
+        "timestamp": payload.get("timestamp", clock.now_iso())
+    }
+    return sender, subject, content, metadata
+
+def _extract_phone(payload: Dict[str, Any]) -> tuple:
+    sender = payload.get("From") or payload.get("sender") or None
+    content = payload.get("TranscriptionText") or payload.get("content") or ""
+    metadata = {
+        "call_sid": payload.get("CallSid", "mock-call-sid-456"),
+        "transcription_confidence": float(payload.get("TranscriptionConfidence", 0.92)),
+        "timestamp": payload.get("timestamp", clock.now_iso())
+    }
+    return sender, "(no subject)", content, metadata
+
+def _extract_generic(payload: Dict[str, Any]) -> tuple:
+    sender = payload.get("from") or payload.get("sender") or payload.get("email") or None
+    subject = payload.get("subject") or payload.get("title") or "(no subject)"
+    content = payload.get("message") or payload.get("content") or payload.get("body") or ""
+    return sender, subject, content, payload.get("metadata", {})
+
+# Channel-keyed dispatch instead of an if/elif chain: one dict lookup
+# regardless of channel count, and adding a source means adding an
+# extractor plus one table entry.
+_CHANNEL_EXTRACTORS = {
+    "gmail": _extract_gmail,
+    "phone": _extract_phone
+}
+
+@lru_cache(maxsize=1)
+def _get_classify_agent() -> ClassificationAgent:
+    """Process-wide agent for webhook classification; built on first use."""
+    return ClassificationAgent()
+
 async def normalize_webhook_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Normalizes raw webhook payload into a structured message for classification.
@@ -19,46 +126,21 @@ async def normalize_webhook_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     Raises:
         ValueError: If critical fields (sender, content) are missing or invalid.
     """
-    logger.debug(f"[Webhook] Normalizing payload: {payload}")
+    logger.debug("[Webhook] Normalizing payload from channel %s", payload.get("channel", "webhook"))
     
-    # Determine source type
+    # Determine source type and dispatch to the channel's extractor
     channel = payload.get("channel", "webhook").lower()
-    
-    # Normalize based on source
-    if channel == "gmail":
-        sender = payload.get("from") or payload.get("sender") or payload.get("email") or None
-        subject = payload.get("subject") or payload.get("title") or "(no subject)"
-        content = payload.get("message") or payload.get("content") or payload.get("body") or ""
-        metadata = {
-            "thread_id": payload.get("thread_id", "mock-thread-123"),
-            "labels": payload.get("labels", ["INBOX", "UNREAD"]),
-            "timestamp": payload.get("timestamp", datetime.utcnow().isoformat())
-        }
-    elif channel == "phone":
-        sender = payload.get("From") or payload.get("sender") or None
-        subject = "(no subject)"
-        content = payload.get("TranscriptionText") or payload.get("content") or ""
-        metadata = {
-            "call_sid": payload.get("CallSid", "mock-call-sid-456"),
-            "transcription_confidence": float(payload.get("TranscriptionConfidence", 0.92)),
-            "timestamp": payload.get("timestamp", datetime.utcnow().isoformat())
-        }
-    else:
-        sender = payload.get("from") or payload.get("sender") or payload.get("email") or None
-        subject = payload.get("subject") or payload.get("title") or "(no subject)"
-        content = payload.get("message") or payload.get("content") or payload.get("body") or ""
-        metadata = payload.get("metadata", {})
+    extractor = _CHANNEL_EXTRACTORS.get(channel, _extract_generic)
+    sender, subject, content, metadata = extractor(payload)
     
     # Infer product if not provided
     product = payload.get("product") or payload.get("source_product") or "Unknown"
     if product == "Unknown":
-        content_lower = content.lower()
-        if "compactor" in content_lower:
-            product = "Pioneer"
-        elif "pickup" in content_lower:
-            product = "Hauler"
-        elif "invoice" in content_lower:
-            product = "Discovery"
+        found = set(_PRODUCT_RE.findall(content.lower()))
+        for keyword in _PRODUCT_PRIORITY:
+            if keyword in found:
+                product = _PRODUCT_BY_KEYWORD[keyword]
+                break
     
     # Validate required fields
     if not sender:
@@ -74,11 +156,11 @@ async def normalize_webhook_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
         "content": content.strip(),
         "product": product.strip(),
         "channel": channel.strip(),
-        "timestamp": metadata.get("timestamp", datetime.utcnow().isoformat()),
+        "timestamp": metadata.get("timestamp", clock.now_iso()),
         "metadata": metadata
     }
     
-    logger.info(f"[Webhook] Normalized payload: {normalized}")
+    logger.info("[Webhook] Normalized payload from %s via %s", sender, channel)
     return normalized
 
 async def handle_webhook(req: Request) -> ClassificationResult:
@@ -95,29 +177,49 @@ async def handle_webhook(req: Request) -> ClassificationResult:
         HTTPException: For invalid payloads or classification failures.
     """
     try:
-        body = await req.json()
-        logger.info(f"[Webhook] Received webhook event at {datetime.utcnow().isoformat()}")
-        
-        # Normalize webhook to internal format
-        normalized_msg = await normalize_webhook_payload(body)
-        
-        # Run LLM-powered classification
-        classify_agent = ClassificationAgent()
+        # Start the body read eagerly and do request-side setup (agent
+        # lookup, per-request metadata) while the bytes stream in.
+        body_task = asyncio.create_task(req.body())
+        classify_agent = _get_classify_agent()
         classify_agent.set_metadata({
             "request_id": getattr(req.state, "request_id", "unknown"),
             "ip": req.client.host
         })
-        result_dict = await classify_agent.execute(normalized_msg)
+        logger.info("[Webhook] Received webhook event at %s", clock.now_iso())
+        
+        # orjson over Request.json(): parses straight from the raw bytes
+        # without the stdlib json hot path. Malformed JSON raises
+        # orjson.JSONDecodeError, a ValueError, so it surfaces as a 400
+        # like any other invalid payload.
+        body = orjson.loads(await body_task)
+        # Normalize webhook to internal format
+        normalized_msg = await normalize_webhook_payload(body)
+        
+        cache_key = _payload_key(normalized_msg)
+        cached = _exact_cache.get(cache_key)
+        if cached is not None:
+            logger.info("[Webhook] Exact-match cache hit for %s", normalized_msg["sender"])
+            return _to_classification_result(cached)
+        
+        thread_id = body.get("thread_id")
+        if thread_id is not None:
+            cached = _thread_cache.get(thread_id)
+            if cached is not None:
+                logger.info("[Webhook] Thread cache hit for %s", thread_id)
+                return _to_classification_result(cached)
+        
+        # Run LLM-powered classification under the shared concurrency cap
+        async with LLM_SEM:
+            result_dict = await classify_agent.execute(normalized_msg)
+        if not result_dict.get("error"):
+            _exact_cache[cache_key] = result_dict
+            if thread_id is not None:
+                _thread_cache[thread_id] = result_dict
         
         # Enforce response schema
-        result = ClassificationResult(
-            **result_dict,
-            classified_at=datetime.utcnow(),
-            fallback_used=bool(result_dict.get("error")),
-            error=result_dict.get("error")
-        )
+        result = _to_classification_result(result_dict)
         
-        logger.info(f"[Webhook] Classification complete: {result.dict()}")
+        logger.info("[Webhook] Classification complete: %s / %s", result.category, result.intent)
         return result
     except ValueError as ve:
         logger.error("[Webhook] Invalid payload: %s", str(ve))
@@ -130,7 +232,25 @@ async def handle_webhook(req: Request) -> ClassificationResult:
             intent="Unknown",
             recommended_queue="Customer Support",
             confidence=0.0,
-            classified_at=datetime.utcnow(),
+            classified_at=clock.utcnow(),
             fallback_used=True,
             error=str(e)
         )
+
+async def process_queued_webhook(payload: Dict[str, Any]) -> None:
+    """
+    Runs the normalize + classify pipeline for a payload taken off the
+    ingestion queue. Invalid payloads are logged and dropped — there is
+    no caller left to return an error to.
+    """
+    try:
+        normalized_msg = await normalize_webhook_payload(payload)
+    except ValueError as ve:
+        logger.error("[Webhook] Dropping queued payload: %s", str(ve))
+        return
+    async with LLM_SEM:
+        result = await _get_classify_agent().execute(normalized_msg)
+    logger.info(
+        "[Webhook] Queued payload classified: %s / %s",
+        result["category"], result["intent"]
+    )
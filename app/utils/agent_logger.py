@@ -1,22 +1,120 @@
 # app/utils/agent_logger.py
 
+import atexit
+import itertools
 import logging
+import os
+import queue
+import secrets
+import sys
+import threading
 from typing import Optional
-from uuid import uuid4
-from datetime import datetime
-
-# Configure the root logger once for the entire app
-logger = logging.getLogger("agent")
-logger.setLevel(logging.INFO)
-
-# Optional: Console handler for local dev
-console_handler = logging.StreamHandler()
-formatter = logging.Formatter(
-    "%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
+
+import orjson
+import structlog
+
+from app.utils import clock
+
+
+class _QueueWriter:
+    """
+    File-like sink that enqueues rendered log lines for a background
+    thread to write. Producers (request handlers on the event loop) pay
+    a SimpleQueue.put — microseconds, no lock contention — and the
+    writer thread absorbs the blocking stderr I/O. close() drains the
+    queue so nothing is lost at interpreter exit.
+    """
+
+    def __init__(self):
+        self._q: "queue.SimpleQueue[Optional[bytes]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._drain, name="agent-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, data: bytes) -> None:
+        self._q.put(data)
+
+    def flush(self) -> None:
+        pass
+
+    def _drain(self) -> None:
+        # Blocking get for the first line, then opportunistically take
+        # everything already queued and emit it as one write + one
+        # flush: under bursts, N events cost a single syscall pair
+        # instead of N of them.
+        while True:
+            item = self._q.get()
+            if item is None:
+                break
+            chunk = [item]
+            try:
+                while True:
+                    nxt = self._q.get_nowait()
+                    if nxt is None:
+                        sys.stderr.buffer.write(b"".join(chunk))
+                        sys.stderr.buffer.flush()
+                        return
+                    chunk.append(nxt)
+            except queue.Empty:
+                pass
+            sys.stderr.buffer.write(b"".join(chunk))
+            sys.stderr.buffer.flush()
+
+    def close(self) -> None:
+        self._q.put(None)
+        self._thread.join(timeout=2.0)
+
+
+_writer = _QueueWriter()
+atexit.register(_writer.close)
+
+# structlog with an all-bytes pipeline: each event renders straight to
+# JSON via orjson's C serializer and is written in a single call — no
+# stdlib LogRecord construction, no Formatter %-interpolation, and no
+# str(dict) repr on emission. cache_logger_on_first_use freezes the
+# processor chain after the first event instead of re-resolving it per
+# call. default=str keeps unexpected payload types (exceptions, model
+# objects) from aborting the write.
+def _add_timestamp(logger, method_name, event_dict):
+    """
+    Stamps events from the cached coarse clock instead of structlog's
+    TimeStamper, which allocates a datetime and formats it per event;
+    agent-execution logs don't need better than the clock's ~10 ms tick.
+    """
+    event_dict["timestamp"] = clock.now_iso()
+    return event_dict
+
+
+structlog.configure(
+    processors=[
+        structlog.processors.add_log_level,
+        _add_timestamp,
+        structlog.processors.JSONRenderer(serializer=orjson.dumps, default=str),
+    ],
+    logger_factory=structlog.BytesLoggerFactory(file=_writer),
+    wrapper_class=structlog.make_filtering_bound_logger(
+        getattr(logging, os.getenv("AGENT_LOG_LEVEL", "INFO").upper(), logging.INFO)
+    ),
+    cache_logger_on_first_use=True,
 )
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+
+logger = structlog.get_logger("agent")
+
+# Effective level for agent-event logging; WARN-only deployments (CI,
+# load tests) set AGENT_LOG_LEVEL=WARNING and log_agent_event becomes a
+# single integer compare.
+_MIN_LEVEL = getattr(
+    logging, os.getenv("AGENT_LOG_LEVEL", "INFO").upper(), logging.INFO
+)
+
+# Fallback request IDs: a per-process random nonce plus a monotonic
+# counter. uuid4 reads 16 urandom bytes and hex-formats them per call;
+# an interned-nonce + counter increment is far cheaper, stays unique
+# across restarts via the nonce, and the counter's __next__ is atomic
+# under the GIL.
+_pid_nonce = secrets.token_hex(4)
+_counter = itertools.count()
 
 
 def log_agent_event(
@@ -27,14 +125,16 @@ def log_agent_event(
     error: Optional[str] = None,
     request_id: Optional[str] = None,
 ):
-    log_payload = {
-        "event_type": "agent_execution",
-        "timestamp": datetime.utcnow().isoformat(),
-        "agent": agent_name,
-        "request_id": request_id or str(uuid4()),
-        "input": input_data,
-        "output": output_data,
-        "fallback_used": fallback_used,
-        "error": error,
-    }
-    logger.info(log_payload)
+    # Bail before touching the payload: when INFO is filtered out this
+    # skips the uuid fallback and keyword-dict construction entirely.
+    if _MIN_LEVEL > logging.INFO:
+        return
+    logger.info(
+        "agent_execution",
+        agent=agent_name,
+        request_id=request_id or f"{_pid_nonce}-{next(_counter):x}",
+        input=input_data,
+        output=output_data,
+        fallback_used=fallback_used,
+        error=error,
+    )
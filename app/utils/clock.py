@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+# Coarse process clock. datetime.utcnow() costs a libc time syscall plus
+# object construction per call; log records and classified_at stamps
+# don't need better than ~10 ms accuracy, so a background task refreshes
+# these cached values and hot paths just read them. Until start() runs
+# (scripts, tests) the values are the import-time instant.
+
+_now_dt: datetime = datetime.utcnow()
+_now_iso: str = _now_dt.isoformat() + "Z"
+_tick_task: Optional[asyncio.Task] = None
+
+
+def utcnow() -> datetime:
+    """Returns the cached coarse UTC timestamp as a datetime."""
+    return _now_dt
+
+
+def now_iso() -> str:
+    """Returns the cached coarse UTC timestamp as an ISO-8601 string."""
+    return _now_iso
+
+
+async def _tick(interval: float = 0.01) -> None:
+    global _now_dt, _now_iso
+    while True:
+        _now_dt = datetime.utcnow()
+        _now_iso = _now_dt.isoformat() + "Z"
+        await asyncio.sleep(interval)
+
+
+def start() -> None:
+    """Starts the refresh task; idempotent, needs a running event loop."""
+    global _tick_task
+    if _tick_task is None or _tick_task.done():
+        _tick_task = asyncio.get_running_loop().create_task(_tick())
+
+
+def stop() -> None:
+    """Cancels the refresh task at shutdown."""
+    global _tick_task
+    if _tick_task is not None:
+        _tick_task.cancel()
+        _tick_task = None
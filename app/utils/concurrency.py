@@ -0,0 +1,9 @@
+import asyncio
+import os
+
+# Process-wide cap on in-flight LLM calls. One semaphore shared by every
+# entry point (message routes, webhook handler, background workers) so
+# the cap reflects the upstream provider's rate limit no matter which
+# path the traffic arrives on. Sliding-window semantics: each finished
+# call immediately admits the next waiter.
+LLM_SEM = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "20")))
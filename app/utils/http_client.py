@@ -0,0 +1,11 @@
+import httpx
+
+# Shared connection pool for all outbound LLM traffic. A module-level
+# singleton means every agent instance multiplexes over the same warmed
+# HTTP/2 connections instead of paying a fresh TCP+TLS handshake per
+# concurrent request.
+shared_async_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+    timeout=httpx.Timeout(10.0, connect=2.0)
+)
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Optional
+from app.utils.logger import logger
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    _EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    _EMBEDDINGS_AVAILABLE = False
+
+
+class SemanticCache:
+    """
+    Near-match cache tier for LLM results. Sits above an exact-match cache:
+    on an exact miss, embeds the text with a small local model and returns
+    the stored payload of the nearest previous entry when cosine similarity
+    exceeds the threshold, so paraphrased duplicates skip the LLM round trip.
+
+    The embedding model (sentence-transformers) is an optional dependency;
+    when it is not installed the cache degrades to a no-op so callers never
+    need to special-case it.
+    """
+
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 1000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._entries: deque = deque(maxlen=max_entries)  # (vector, payload) pairs
+
+    @property
+    def enabled(self) -> bool:
+        return _EMBEDDINGS_AVAILABLE
+
+    def _embed(self, text: str):
+        # Runs on a worker thread (see get/add); the lock keeps two
+        # concurrent first calls from loading the model twice.
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    logger.info("[SemanticCache] Loading embedding model: %s", self.model_name)
+                    self._model = SentenceTransformer(self.model_name)
+        # Normalized embeddings make inner product equal cosine similarity
+        return self._model.encode(text, normalize_embeddings=True)
+
+    async def get(self, text: str) -> Optional[Any]:
+        """Returns the payload of the most similar cached entry, or None."""
+        if not _EMBEDDINGS_AVAILABLE or not self._entries:
+            return None
+        try:
+            # encode() (and the lazy model load) is tens of ms of CPU;
+            # off the event loop so it never stalls other requests.
+            vec = await asyncio.to_thread(self._embed, text)
+            matrix = np.stack([entry[0] for entry in self._entries])
+            scores = matrix @ vec
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                logger.info("[SemanticCache] Hit (similarity=%.3f)", float(scores[best]))
+                return self._entries[best][1]
+        except Exception as e:
+            logger.warning("[SemanticCache] Lookup failed, treating as miss: %s", str(e))
+        return None
+
+    async def add(self, text: str, payload: Any) -> None:
+        """Stores a payload under the embedding of text. Oldest entries are evicted."""
+        if not _EMBEDDINGS_AVAILABLE:
+            return
+        try:
+            self._entries.append((await asyncio.to_thread(self._embed, text), payload))
+        except Exception as e:
+            logger.warning("[SemanticCache] Failed to store entry: %s", str(e))
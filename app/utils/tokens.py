@@ -0,0 +1,83 @@
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+
+import tiktoken
+
+from app.utils.logger import logger
+
+# Content token budget for agent prompts. The 2000-char sanitize slice is
+# only a coarse guard — char counts and token counts diverge badly on
+# dense text — so prompts are clipped against the real tokenizer before
+# they reach the API, keeping input cost and context use predictable.
+MAX_CONTENT_TOKENS = 512
+
+# After a failed encoder load (tiktoken fetches the BPE vocabulary over
+# the network on first use), don't retry for this long: each retry is a
+# full network attempt and would stall every message during an outage.
+_ENCODER_RETRY_SECONDS = 300.0
+_encoder_failed_at: Dict[str, float] = {}
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: str) -> "tiktoken.Encoding":
+    """
+    Returns the tokenizer for a model, cached per model name: building an
+    encoding loads a BPE vocabulary and is far too slow to repeat per
+    message. Unknown (e.g. future) model names fall back to cl100k_base.
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def _get_encoder_or_none(model: str) -> Optional["tiktoken.Encoding"]:
+    """
+    get_encoder with failures treated as soft: vocabulary loading can hit
+    the network (and fail — DNS, CDN, egress policy), and lru_cache does
+    not cache exceptions, so a bare call would retry the download on
+    every message. Failures are remembered per model and only retried
+    after a cool-off.
+    """
+    failed_at = _encoder_failed_at.get(model)
+    if failed_at is not None and time.monotonic() - failed_at < _ENCODER_RETRY_SECONDS:
+        return None
+    try:
+        encoder = get_encoder(model)
+    except Exception as e:
+        _encoder_failed_at[model] = time.monotonic()
+        logger.warning(
+            "[Tokens] Could not load tokenizer for %s (%s); "
+            "degrading to character-based truncation for %.0fs",
+            model, e, _ENCODER_RETRY_SECONDS
+        )
+        return None
+    _encoder_failed_at.pop(model, None)
+    return encoder
+
+
+def prewarm_encoders(*models: str) -> None:
+    """
+    Loads (and caches) the tokenizers for the given models so the first
+    message never pays — or fails on — the vocabulary fetch. Load errors
+    are logged and swallowed; truncate_to_tokens degrades gracefully.
+    """
+    for model in dict.fromkeys(models):
+        _get_encoder_or_none(model)
+
+
+def truncate_to_tokens(text: str, model: str, max_tokens: int = MAX_CONTENT_TOKENS) -> str:
+    """
+    Clips text to at most max_tokens tokens under the model's tokenizer.
+    When the tokenizer cannot be loaded, returns the text unchanged so
+    callers fall back to their coarse character-slice guard instead of
+    erroring — a tokenizer outage must not take down the no-LLM tiers.
+    """
+    encoder = _get_encoder_or_none(model)
+    if encoder is None:
+        return text
+    tokens = encoder.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoder.decode(tokens[:max_tokens])
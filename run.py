@@ -1,4 +1,23 @@
+import os
+
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    if os.getenv("DEV_RELOAD"):
+        # reload forces a single worker and a file watcher; keep the old
+        # behavior behind a flag for local development.
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        # uvloop + httptools (bundled with uvicorn[standard]) and one
+        # worker per core; access logs go through the request-ID
+        # middleware already, so uvicorn's own access log is redundant.
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="uvloop",
+            http="httptools",
+            workers=int(os.getenv("WEB_WORKERS", os.cpu_count() or 1)),
+            log_level="info",
+            access_log=False
+        )
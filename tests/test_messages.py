@@ -1,66 +1,92 @@
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from httpx import AsyncClient
-from unittest.mock import AsyncMock, patch
+from httpx import ASGITransport, AsyncClient
+from unittest.mock import MagicMock, patch
 from app.main import app
+from app.routes.messages import get_classify_agent, get_draft_agent
 from app.agents.base_agent import AgentOutput, AgentInput
 
-@pytest.fixture
-def client():
-    """Create a FastAPI test client."""
-    return TestClient(app)
+# Shared result prototypes: built once at import instead of per fixture
+# setup. Tests only read fields from the responses, so sharing is safe.
+_CLASSIFY_OUT = AgentOutput(
+    category="Billing Support",
+    intent="Invoice Dispute",
+    priority="High",
+    recommended_queue="Finance Support",
+    confidence=0.95,
+    fallback_used=False,
+    error=None,
+    _agent="ClassificationAgent",
+    _version="2.0.0",
+    _latency_ms=100.0
+)
 
-@pytest.fixture
+_DRAFT_OUT = AgentOutput(
+    reply_draft="Thank you for your message. We'll review your invoice and respond within 24 hours.",
+    category="Billing Support",
+    intent="Invoice Dispute",
+    priority="High",
+    recommended_queue="Finance Support",
+    confidence=0.95,
+    fallback_used=False,
+    error=None,
+    _agent="DraftResponseAgent",
+    _version="2.0.0",
+    _latency_ms=150.0
+)
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+def _post(client, url, payload):
+    """POSTs a payload pre-encoded with orjson instead of httpx's stdlib json= path."""
+    return client.post(url, content=orjson.dumps(payload), headers=_JSON_HEADERS)
+
+@pytest.fixture(scope="module")
 async def async_client():
-    """Create an async HTTPX client for testing async endpoints."""
-    return AsyncClient(app=app, base_url="http://test")
+    """
+    Module-scoped async client dispatching straight into the ASGI app.
+    ASGITransport skips sockets entirely, and sharing one client across
+    the module avoids TestClient's thread-plus-portal setup per request.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+# Plain coroutine stubs: none of these tests assert call_count or
+# call_args, so AsyncMock's per-call bookkeeping is pure overhead.
+async def _classify_stub(*args, **kwargs):
+    return _CLASSIFY_OUT
+
+async def _draft_stub(*args, **kwargs):
+    return _DRAFT_OUT
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_classify_agent():
-    """Mock ClassificationAgent.execute method."""
-    with patch("app.routes.messages.ClassificationAgent") as mock:
-        mock_instance = mock.return_value
-        mock_instance.execute = AsyncMock(return_value=AgentOutput(
-            category="Billing Support",
-            intent="Invoice Dispute",
-            priority="High",
-            recommended_queue="Finance Support",
-            confidence=0.95,
-            fallback_used=False,
-            error=None,
-            _agent="ClassificationAgent",
-            _version="2.0.0",
-            _latency_ms=100.0
-        ))
-        mock_instance.set_metadata = AsyncMock()
-        yield mock_instance
-
-@pytest.fixture
+    """Swap the classification agent via dependency override (one dict write per module)."""
+    mock_instance = MagicMock()
+    mock_instance.execute = _classify_stub
+    app.dependency_overrides[get_classify_agent] = lambda: mock_instance
+    yield mock_instance
+    app.dependency_overrides.pop(get_classify_agent, None)
+
+@pytest.fixture(scope="module")
 def mock_draft_agent():
-    """Mock DraftResponseAgent.execute method."""
-    with patch("app.routes.messages.DraftResponseAgent") as mock:
-        mock_instance = mock.return_value
-        mock_instance.execute = AsyncMock(return_value=AgentOutput(
-            reply_draft="Thank you for your message. We'll review your invoice and respond within 24 hours.",
-            category="Billing Support",
-            intent="Invoice Dispute",
-            priority="High",
-            recommended_queue="Finance Support",
-            confidence=0.95,
-            fallback_used=False,
-            error=None,
-            _agent="DraftResponseAgent",
-            _version="2.0.0",
-            _latency_ms=150.0
-        ))
-        mock_instance.set_metadata = AsyncMock()
-        yield mock_instance
-
-@pytest.mark.asyncio
-async def test_ingest_endpoint_gmail(async_client, mock_classify_agent, mock_draft_agent):
-    """Test the /ingest endpoint with mock Gmail source."""
-    payload = {"source": "gmail", "mock": True}
-    response = await async_client.post("/api/v1/messages/ingest", json=payload)
+    """Swap the draft agent via dependency override (one dict write per module)."""
+    mock_instance = MagicMock()
+    mock_instance.execute = _draft_stub
+    app.dependency_overrides[get_draft_agent] = lambda: mock_instance
+    yield mock_instance
+    app.dependency_overrides.pop(get_draft_agent, None)
+
+@pytest.fixture(autouse=True)
+def _use_agent_mocks(mock_classify_agent, mock_draft_agent):
+    """Keeps the agent overrides active for every test in the module."""
+    yield
+
+@pytest.mark.parametrize("source", ["gmail", "phone"])
+async def test_ingest_endpoint(async_client, mock_classify_agent, mock_draft_agent, source):
+    """Test the /ingest endpoint with each mock source."""
+    payload = {"source": source, "mock": True}
+    response = await _post(async_client, "/api/v1/messages/ingest", payload)
     
     assert response.status_code == 200
     data = response.json()
@@ -70,28 +96,14 @@ async def test_ingest_endpoint_gmail(async_client, mock_classify_agent, mock_dra
     assert "draft" in data
     assert "Thank you for your message" in data["draft"]["reply_draft"]
 
-@pytest.mark.asyncio
-async def test_ingest_endpoint_phone(async_client, mock_classify_agent, mock_draft_agent):
-    """Test the /ingest endpoint with mock phone source."""
-    payload = {"source": "phone", "mock": True}
-    response = await async_client.post("/api/v1/messages/ingest", json=payload)
-    
-    assert response.status_code == 200
-    data = response.json()
-    assert "classification" in data
-    assert data["classification"]["category"] == "Billing Support"
-    assert "draft" in data
-
-@pytest.mark.asyncio
 async def test_ingest_endpoint_invalid_source(async_client):
     """Test the /ingest endpoint with an invalid source."""
     payload = {"source": "invalid", "mock": True}
-    response = await async_client.post("/api/v1/messages/ingest", json=payload)
+    response = await _post(async_client, "/api/v1/messages/ingest", payload)
     
     assert response.status_code == 400
     assert "Invalid source" in response.json()["detail"]
 
-@pytest.mark.asyncio
 async def test_classify_endpoint(async_client, mock_classify_agent):
     """Test the /classify endpoint with valid input."""
     payload = {
@@ -99,7 +111,7 @@ async def test_classify_endpoint(async_client, mock_classify_agent):
         "content": "I have an issue with my invoice.",
         "metadata": {"product": "Discovery"}
     }
-    response = await async_client.post("/api/v1/messages/classify", json=payload)
+    response = await _post(async_client, "/api/v1/messages/classify", payload)
     
     assert response.status_code == 200
     data = response.json()
@@ -107,19 +119,17 @@ async def test_classify_endpoint(async_client, mock_classify_agent):
     assert data["intent"] == "Invoice Dispute"
     assert data["confidence"] == 0.95
 
-@pytest.mark.asyncio
 async def test_classify_endpoint_missing_content(async_client):
     """Test the /classify endpoint with missing content."""
     payload = {
         "sender": "test@example.com",
         "metadata": {"product": "Discovery"}
     }
-    response = await async_client.post("/api/v1/messages/classify", json=payload)
+    response = await _post(async_client, "/api/v1/messages/classify", payload)
     
     assert response.status_code == 422  # Unprocessable Entity
     assert "content" in response.json()["detail"][0]["loc"]
 
-@pytest.mark.asyncio
 async def test_draft_endpoint(async_client, mock_draft_agent):
     """Test the /draft endpoint with valid input."""
     payload = {
@@ -131,14 +141,138 @@ async def test_draft_endpoint(async_client, mock_draft_agent):
             "confidence": 0.95
         }
     }
-    response = await async_client.post("/api/v1/messages/draft", json=payload)
+    response = await _post(async_client, "/api/v1/messages/draft", payload)
     
     assert response.status_code == 200
     data = response.json()
     assert "Thank you for your message" in data["reply_draft"]
     assert data["confidence"] == 0.95
 
-@pytest.mark.asyncio
+async def test_classify_batch_endpoint(async_client, mock_classify_agent):
+    """Test /classify/batch returns one result per message, in input order."""
+    echo = MagicMock()
+    async def _echo_execute(data):
+        # Echo the content into intent so order alignment is observable.
+        return dict(_CLASSIFY_OUT, intent=data["content"])
+    echo.execute = _echo_execute
+    app.dependency_overrides[get_classify_agent] = lambda: echo
+    try:
+        payload = {"messages": [
+            {"sender": f"user{i}@example.com", "content": f"message {i}"}
+            for i in range(3)
+        ]}
+        response = await _post(async_client, "/api/v1/messages/classify/batch", payload)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [d["intent"] for d in data] == ["message 0", "message 1", "message 2"]
+        assert all(d["category"] == "Billing Support" for d in data)
+    finally:
+        app.dependency_overrides[get_classify_agent] = lambda: mock_classify_agent
+
+async def test_classify_batch_endpoint_agent_error(async_client, mock_classify_agent):
+    """Test /classify/batch surfaces an agent failure as a 500."""
+    broken = MagicMock()
+    async def _raise_execute(data):
+        raise RuntimeError("boom")
+    broken.execute = _raise_execute
+    app.dependency_overrides[get_classify_agent] = lambda: broken
+    try:
+        payload = {"messages": [{"sender": "user@example.com", "content": "hello"}]}
+        response = await _post(async_client, "/api/v1/messages/classify/batch", payload)
+
+        assert response.status_code == 500
+        assert "Batch classification failed" in response.json()["detail"]
+    finally:
+        app.dependency_overrides[get_classify_agent] = lambda: mock_classify_agent
+
+async def test_triage_batch_endpoint(async_client, mock_classify_agent, mock_draft_agent):
+    """Test /triage/batch pairs each classification with a draft, in input order."""
+    async def _run_batch_stub(items):
+        return [dict(_CLASSIFY_OUT, intent=i["content"]) for i in items]
+    mock_classify_agent.run_batch = _run_batch_stub
+
+    payload = {"items": [
+        {"sender": f"user{i}@example.com", "content": f"message {i}"}
+        for i in range(2)
+    ]}
+    response = await _post(async_client, "/api/v1/messages/triage/batch", payload)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [d["classification"]["intent"] for d in data] == ["message 0", "message 1"]
+    assert all("Thank you for your message" in d["draft"]["reply_draft"] for d in data)
+
+async def test_triage_batch_endpoint_agent_error(async_client, mock_classify_agent):
+    """Test /triage/batch surfaces a batch-classification failure as a 500."""
+    async def _raise_run_batch(items):
+        raise RuntimeError("boom")
+    mock_classify_agent.run_batch = _raise_run_batch
+
+    payload = {"items": [{"sender": "user@example.com", "content": "hello"}]}
+    response = await _post(async_client, "/api/v1/messages/triage/batch", payload)
+
+    assert response.status_code == 500
+    assert "Batch triage failed" in response.json()["detail"]
+
+# /draft/stream builds its own per-request agent (on_token plumbing), so
+# it is stubbed by patching the class in the route module rather than
+# through the dependency overrides.
+class _FakeStreamAgent:
+    tokens = ("Thanks for", "your message")
+    result = {"confidence": 0.9, "fallback_used": False, "error": None}
+
+    def __init__(self, on_token=None, **kwargs):
+        self.on_token = on_token
+
+    def set_metadata(self, metadata):
+        pass
+
+    async def execute(self, input_data):
+        for token in self.tokens:
+            self.on_token(token)
+        return dict(self.result)
+
+class _FallbackStreamAgent(_FakeStreamAgent):
+    tokens = ()
+    result = {"confidence": 0.0, "fallback_used": True, "error": "rate limited"}
+
+_DRAFT_PAYLOAD = {
+    "sender": "test@example.com",
+    "content": "I have an issue with my invoice.",
+    "classification": {
+        "category": "Billing Support",
+        "intent": "Invoice Dispute",
+        "confidence": 0.95
+    }
+}
+
+async def test_draft_stream_endpoint(async_client):
+    """Test /draft/stream emits token data frames and a terminal done event."""
+    with patch("app.routes.messages.DraftResponseAgent", _FakeStreamAgent):
+        response = await _post(async_client, "/api/v1/messages/draft/stream", _DRAFT_PAYLOAD)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    body = response.text
+    assert "data: Thanks for\n" in body
+    assert "data: your message\n" in body
+    # The structured metadata arrives as the terminal frame.
+    done_frame = body.rsplit("event: done\ndata: ", 1)[1]
+    meta = orjson.loads(done_frame.split("\n", 1)[0])
+    assert meta == {"confidence": 0.9, "fallback_used": False, "error": None}
+
+async def test_draft_stream_endpoint_agent_error(async_client):
+    """Test /draft/stream reports agent failure in the done frame metadata."""
+    with patch("app.routes.messages.DraftResponseAgent", _FallbackStreamAgent):
+        response = await _post(async_client, "/api/v1/messages/draft/stream", _DRAFT_PAYLOAD)
+
+    assert response.status_code == 200
+    done_frame = response.text.rsplit("event: done\ndata: ", 1)[1]
+    meta = orjson.loads(done_frame.split("\n", 1)[0])
+    assert meta["fallback_used"] is True
+    assert meta["error"] == "rate limited"
+
 async def test_triage_endpoint(async_client, mock_classify_agent, mock_draft_agent):
     """Test the /triage endpoint with valid input."""
     payload = {
@@ -146,7 +280,7 @@ async def test_triage_endpoint(async_client, mock_classify_agent, mock_draft_age
         "content": "I have an issue with my invoice.",
         "metadata": {"product": "Discovery"}
     }
-    response = await async_client.post("/api/v1/messages/triage", json=payload)
+    response = await _post(async_client, "/api/v1/messages/triage", payload)
     
     assert response.status_code == 200
     data = response.json()
@@ -0,0 +1,84 @@
+import asyncio
+
+import orjson
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+
+_JSON_HEADERS = {"content-type": "application/json"}
+_QUEUED_URL = "/api/v1/webhooks/incoming/queued"
+
+_GMAIL_PAYLOAD = {
+    "from": "client@example.com",
+    "subject": "Roll-off ETA missing",
+    "message": "Hi, we scheduled a pickup but haven't received an ETA.",
+    "channel": "gmail",
+    "product": "Hauler",
+}
+
+
+@pytest.fixture(scope="module")
+async def async_client():
+    """Module-scoped async client dispatching straight into the ASGI app."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture
+def ingest_queue():
+    """
+    Installs the ingestion queue the route reads off app.state.
+    ASGITransport never runs the startup handlers, so the queue the
+    workers would normally own has to be provided here.
+    """
+    queue = asyncio.Queue(maxsize=4)
+    app.state.ingest_queue = queue
+    yield queue
+    del app.state.ingest_queue
+
+
+async def test_queued_webhook_accepts_payload(async_client, ingest_queue):
+    """Test /incoming/queued admits a payload and returns 202 immediately."""
+    response = await async_client.post(
+        _QUEUED_URL, content=orjson.dumps(_GMAIL_PAYLOAD), headers=_JSON_HEADERS
+    )
+
+    assert response.status_code == 202
+    assert response.json() == {"queued": True}
+    assert ingest_queue.get_nowait() == _GMAIL_PAYLOAD
+
+
+async def test_queued_webhook_queue_full(async_client, ingest_queue):
+    """Test /incoming/queued returns 503 backpressure when the queue is full."""
+    while not ingest_queue.full():
+        ingest_queue.put_nowait({})
+
+    response = await async_client.post(
+        _QUEUED_URL, content=orjson.dumps(_GMAIL_PAYLOAD), headers=_JSON_HEADERS
+    )
+
+    assert response.status_code == 503
+    assert "queue is full" in response.json()["detail"]
+
+
+async def test_queued_webhook_invalid_json(async_client, ingest_queue):
+    """Test /incoming/queued rejects a malformed body with 400."""
+    response = await async_client.post(
+        _QUEUED_URL, content=b"{not json", headers=_JSON_HEADERS
+    )
+
+    assert response.status_code == 400
+    assert "Invalid JSON" in response.json()["detail"]
+    assert ingest_queue.empty()
+
+
+async def test_queued_webhook_invalid_api_key(async_client):
+    """Test /incoming/queued rejects a wrong API key before touching the queue."""
+    response = await async_client.post(
+        _QUEUED_URL,
+        content=orjson.dumps(_GMAIL_PAYLOAD),
+        headers={**_JSON_HEADERS, "x-api-key": "wrong-key"},
+    )
+
+    assert response.status_code == 403
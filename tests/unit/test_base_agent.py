@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from app.agents.base_agent import BaseAgent
+
+# Exercises execute() end to end with real run implementations — no
+# mocks — so the timing and fallback plumbing is covered on both paths.
+
+pytestmark = pytest.mark.unit
+
+
+class _EchoAgent(BaseAgent):
+    name = "EchoAgent"
+
+    def run(self, input_data):
+        return {"category": "General Inquiry", "confidence": 0.5}
+
+
+class _FailingAgent(BaseAgent):
+    name = "FailingAgent"
+
+    def run(self, input_data):
+        raise RuntimeError("boom")
+
+
+def test_execute_success_records_latency():
+    """Test that a real run() completes and stamps agent metadata."""
+    result = asyncio.run(_EchoAgent().execute({"sender": "a@b.c", "content": "hi"}))
+
+    assert result["category"] == "General Inquiry"
+    assert result["fallback_used"] is False
+    assert result["_agent"] == "EchoAgent"
+    assert result["_latency_ms"] >= 0.0
+
+
+def test_execute_failure_falls_back_with_latency():
+    """Test that a raising run() produces the fallback result."""
+    result = asyncio.run(_FailingAgent().execute({"sender": "a@b.c", "content": "hi"}))
+
+    assert result["fallback_used"] is True
+    assert result["error"] == "boom"
+    assert result["_latency_ms"] >= 0.0
@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+
+from app.ingestion.sources import ingest_from_gmail, ingest_from_phone, IngestionError
+
+# Pure unit assertions: no FastAPI app, no mocks, no fixtures. Keeping
+# them here lets `pytest tests/unit -m unit` run without importing the
+# web stack.
+
+pytestmark = pytest.mark.unit
+
+
+def test_ingest_from_gmail_non_mock():
+    """Test ingest_from_gmail with mock=False raises IngestionError."""
+    with pytest.raises(IngestionError, match="Gmail integration is not implemented"):
+        asyncio.run(ingest_from_gmail(mock=False))
+
+
+def test_ingest_from_phone_non_mock():
+    """Test ingest_from_phone with mock=False raises IngestionError."""
+    with pytest.raises(IngestionError, match="Phone ingestion is not implemented"):
+        asyncio.run(ingest_from_phone(mock=False))